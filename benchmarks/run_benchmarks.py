@@ -0,0 +1,166 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Benchmarks of python-replicated against a local stand-in for the
+Vendor API.
+
+Run from the root of the repository::
+
+    python benchmarks/run_benchmarks.py --releases 5000 --licenses 50000
+
+For each benchmark this reports the number of requests issued, the
+median wall time and the peak memory allocated while it ran.  Peak
+memory is measured with :mod:`tracemalloc` and includes the transient
+buffers of the stand-in server, which runs in the same process.
+
+"""
+from __future__ import print_function
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from replicated.core import NewReleaseSource, ReplicatedVendorAPI  # noqa
+from replicated.tests.fake_vendor_api import FakeVendorAPI  # noqa
+
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register a benchmark function taking the API client and an
+    :class:`~replicated.core.App`.
+
+    """
+    def decorator(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return decorator
+
+
+@benchmark('get_apps')
+def bench_get_apps(api, app):
+    api.get_apps()
+
+
+@benchmark('releases: find 50th newest by iteration')
+def bench_releases_find(api, app):
+    target = app.channels[0].release_sequence - 50
+    next(release for release in app.releases if release.sequence == target)
+
+
+@benchmark('releases: list(app.releases)')
+def bench_releases_iterate(api, app):
+    list(app.releases)
+
+
+@benchmark('releases: app.releases[:]')
+def bench_releases_full_slice(api, app):
+    app.releases[:]
+
+
+@benchmark('releases: app.releases[0:1000]')
+def bench_releases_slice(api, app):
+    app.releases[0:1000]
+
+
+@benchmark('releases: prefetch(8)[0:1000]')
+def bench_releases_prefetch_slice(api, app):
+    app.releases.prefetch(max_workers=8)[0:1000]
+
+
+@benchmark('licenses: app.licenses')
+def bench_licenses(api, app):
+    app.licenses
+
+
+_assignees = itertools.count()
+
+
+@benchmark('licenses: 10 x Channel.create_license')
+def bench_create_license(api, app):
+    channel = app.channels[0]
+    for _ in range(10):
+        channel.create_license(
+            'benchmark-customer-{0}'.format(next(_assignees)))
+
+
+@benchmark('releases: Release.config round trip')
+def bench_release_config(api, app):
+    release = app.create_release(source=NewReleaseSource.none)
+    release.config = u'---\nname: "Benchmark"\nversion: "2.0.0"\n'
+    release._config = None
+    release.config
+
+
+def run_benchmark(api, func, repeat):
+    """Run ``func`` ``repeat`` times, each on a freshly loaded app.
+
+    Returns the number of requests of the last run, the median wall
+    time and the largest peak of allocated memory, in bytes.
+
+    """
+    times = []
+    peak = 0
+    requests = 0
+    for _ in range(repeat):
+        app = api.get_apps()[0]
+        if tracemalloc is not None:
+            tracemalloc.start()
+        with api.measure() as tally:
+            start = _clock()
+            func(api, app)
+            times.append(_clock() - start)
+        if tracemalloc is not None:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        requests = tally.count
+    times.sort()
+    return requests, times[len(times) // 2], peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=10)
+    parser.add_argument('--releases', type=int, default=2000)
+    parser.add_argument('--licenses', type=int, default=20000)
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='Delay in seconds added to each request by the server.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--filter', default='',
+        help='Only run benchmarks whose name contains this text.')
+    args = parser.parse_args(argv)
+
+    print('Generating {0} releases and {1} licenses...'.format(
+        args.releases, args.licenses))
+    server = FakeVendorAPI(
+        channels=args.channels, releases=args.releases,
+        licenses=args.licenses, latency=args.latency)
+    with server:
+        api = ReplicatedVendorAPI('benchmark-token')
+        width = max(len(name) for name, _ in BENCHMARKS)
+        print('{0:<{width}}  {1:>8}  {2:>10}  {3:>10}'.format(
+            'benchmark', 'requests', 'wall (s)', 'peak (MiB)', width=width))
+        for name, func in BENCHMARKS:
+            if args.filter not in name:
+                continue
+            requests, wall_time, peak = run_benchmark(api, func, args.repeat)
+            print('{0:<{width}}  {1:>8}  {2:>10.4f}  {3:>10.2f}'.format(
+                name, requests, wall_time, peak / 2.0 ** 20, width=width))
+
+
+if __name__ == '__main__':
+    main()
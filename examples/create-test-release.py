@@ -3,7 +3,7 @@ from datetime import datetime
 import click
 import ruamel.yaml
 
-from replicated.core import ReplicatedVendorAPI, NewReleaseSource
+from replicated.core import ReplicatedVendorAPI
 
 
 def convert_release_yaml(raw_yaml, image_tag, version):
@@ -35,14 +35,6 @@ def read_release_yaml(release_file, image_tag, version):
     return converted_yaml
 
 
-def new_release(app, channel, new_release_config):
-    print('Creating new release')
-    release = app.create_release(source=NewReleaseSource.none)
-    release.config = new_release_config
-    release.promote(channels=(channel,), required=False)
-    return release
-
-
 @click.command()
 @click.argument('token', help='A Replicated Vendor API Token')
 @click.argument(
@@ -74,39 +66,21 @@ def main(token, app_name, channel_name, release_file, license_file, image_tag,
 
     api = ReplicatedVendorAPI(token)
     try:
-        app = next(item for item in api.get_apps() if item.name == app_name)
-    except StopIteration:
+        app = api.get_app(name=app_name)
+    except ValueError:
         raise RuntimeError('App {} not found'.format(app_name))
 
-    try:
-        channel = next(item for item in app.channels
-                       if item.name == channel_name)
-    except StopIteration:
-        channel = app.create_channel(channel_name)
-
-    try:
-        existing_release = next(
-            rel for rel in app.releases
-            if rel.sequence == channel.release_sequence)
-    except StopIteration:
-        print('No existing release found')
-        new_release(app, channel, new_release_config)
+    # The version and release notes, which change with time, are not
+    # compared
+    report = app.publish(
+        new_release_config, channel_name, archive_previous=True)
+    channel = report.channel
+    if report.created:
+        print('Created and promoted release {}'.format(
+            report.release.sequence))
     else:
-        expected_yaml = ruamel.yaml.load(new_release_config)
-        existing_yaml = ruamel.yaml.load(existing_release.config)
-
-        # Don't compare the version, which changes with time
-        expected_yaml.pop('version')
-        expected_yaml.pop('release_notes')
-        existing_yaml.pop('version')
-        existing_yaml.pop('release_notes')
-        if expected_yaml != existing_yaml:
-            print('Existing release does not match expected config')
-            new_release(app, channel, new_release_config)
-            existing_release.archive()
-        else:
-            print('Existing release matches expected config; not making '
-                  'changes')
+        print('Existing release matches expected config; not making '
+              'changes')
 
     licenses = app.licenses
     try:
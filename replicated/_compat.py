@@ -0,0 +1,10 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Compatibility helpers for the supported Python versions.
+
+"""
+import time
+
+
+#: A clock that never goes backwards, where available (Python 3).
+monotonic = getattr(time, 'monotonic', time.time)
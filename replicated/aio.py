@@ -0,0 +1,288 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""An asyncio interface to the Replicated Vendor API.
+
+This module requires Python 3.6 or later and the ``aiohttp`` package,
+which can be installed with the ``async`` extra::
+
+    pip install python-replicated[async]
+
+The objects returned are the same :class:`~replicated.core.App`,
+:class:`~replicated.core.Channel`, :class:`~replicated.core.Release`
+and :class:`~replicated.core.License` classes used by the blocking
+:class:`~replicated.core.ReplicatedVendorAPI`, but they are not bound
+to a blocking session: their properties that make requests, such as
+:attr:`Release.config` and :attr:`License.value`, raise
+:class:`RuntimeError`.  All operations that make requests are
+coroutines on :class:`~AsyncReplicatedVendorAPI`::
+
+    async with AsyncReplicatedVendorAPI(token) as api:
+        apps = await api.get_apps()
+        releases = await api.get_releases(apps[0], count=10)
+
+"""
+import json
+
+import aiohttp
+import six
+
+from .config import extract_version
+from .core import (
+    App, License, LicenseIndex, NewReleaseSource, Release, ReleasesSlice,
+    ReplicatedVendorAPI, _create_license_data, _create_release_data,
+    _promote_data, default_user_agent)
+from .exceptions import ReplicatedError
+
+
+class AsyncReplicatedVendorAPI(object):
+    """The asyncio entry-point into the Replicated Vendor API.
+
+    All requests share a single pooled :class:`aiohttp.ClientSession`,
+    so many applications can be managed concurrently from one event
+    loop.  The client should be closed when it is no longer needed,
+    either with :meth:`close` or by using it as an asynchronous context
+    manager.
+
+    """
+
+    def __init__(self, token, limit=100, limit_per_host=0):
+        """Create a :class:`~AsyncReplicatedVendorAPI` instance.
+
+        Parameters
+        ----------
+        token : str
+            The Replicated API token used for authentication.
+        limit : int
+            The maximum number of simultaneous connections.
+        limit_per_host : int
+            The maximum number of simultaneous connections to the same
+            host.  The default of ``0`` means no per-host limit.
+
+        """
+        self._token = token
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._session = None
+
+    @property
+    def base_url(self):
+        """The base URL of all Vendor API calls.
+
+        """
+        return ReplicatedVendorAPI.base_url
+
+    @property
+    def session(self):
+        """The :class:`aiohttp.ClientSession` used to make requests.
+
+        The session is created on first use so that it is bound to the
+        running event loop.
+
+        """
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit, limit_per_host=self._limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    'User-Agent': default_user_agent(),
+                    'Authorization': self._token,
+                },
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying connection pool.
+
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _request(self, method, url, expected_status, data=None):
+        """Make a request and return the decoded JSON body, if any.
+
+        """
+        headers = {}
+        if data is not None:
+            data = json.dumps(data)
+            headers['Content-Type'] = 'application/json'
+        async with self.session.request(
+                method, url, data=data, headers=headers) as response:
+            text = await response.text()
+            if response.status != expected_status:
+                raise ReplicatedError(text, response.status)
+        if not text:
+            return None
+        return json.loads(text)
+
+    async def get_apps(self):
+        """Get a list of all :class:`replicated.core.App` instances.
+
+        """
+        apps_json = await self._request('GET', self.base_url + '/apps', 200)
+        return [App.from_json(item) for item in apps_json]
+
+    async def get_releases(self, app, start=0, count=None):
+        """Fetch a sequence of releases of ``app``, newest first.
+
+        Parameters
+        ----------
+        app : App
+            The application to query for releases.
+        start : int
+            The offset of the first release to fetch.
+        count : int
+            The number of releases to fetch.  If this is ``None``,
+            then all releases from ``start`` are fetched.
+
+        """
+        if count is None:
+            releases = []
+            async for release in self.iter_releases(app, start=start):
+                releases.append(release)
+            return releases
+        releases_json = await self._fetch_releases_page(app, start, count)
+        return [Release.from_json(item, app) for item in releases_json]
+
+    async def iter_releases(self, app, start=0, page_size=None):
+        """Lazily iterate over the releases of ``app``, newest first.
+
+        This is an asynchronous generator that requests one page of
+        releases at a time, like :meth:`ReleasesSlice.iterate`.
+
+        Parameters
+        ----------
+        app : App
+            The application to query for releases.
+        start : int
+            The offset of the first release to yield.
+        page_size : int
+            The number of releases to request per page.  The default
+            is :attr:`ReleasesSlice.default_page_size`.
+
+        """
+        if page_size is None:
+            page_size = ReleasesSlice.default_page_size
+        while True:
+            releases_json = await self._fetch_releases_page(
+                app, start, page_size)
+            for item in releases_json:
+                yield Release.from_json(item, app)
+            if len(releases_json) < page_size:
+                return
+            start += len(releases_json)
+
+    async def _fetch_releases_page(self, app, start, count):
+        if count <= 0:
+            return []
+        url = app.url + '/releases/paged?start={start}&count={count}'
+        response_json = await self._request(
+            'GET', url.format(start=start, count=count), 200)
+        return response_json['releases']
+
+    async def get_licenses(self, app):
+        """List the licenses associated with ``app``.
+
+        """
+        licenses_json = await self._request('GET', app.url + '/licenses', 200)
+        channels = app.channels_by_id
+        licenses = [
+            License.from_json(
+                item, app=app, session=None,
+                channel=channels[item['ChannelId']])
+            for item in licenses_json
+        ]
+        app._license_index = LicenseIndex(licenses)
+        return licenses
+
+    async def create_release(self, app, source=NewReleaseSource.latest):
+        """Create a new :class:`~replicated.core.Release` of ``app``.
+
+        See :meth:`replicated.core.App.create_release`.
+
+        """
+        data = _create_release_data(source)
+        response_json = await self._request(
+            'POST', app.url + '/release', 201, data=data)
+        new_release = Release.from_create_json(response_json, app)
+        if new_release.created_at is None:
+            await self.refresh(new_release)
+        return new_release
+
+    async def promote(self, release, channels, required=True,
+                      release_notes=None, label=None):
+        """Promote ``release`` to one or more channels.
+
+        See :meth:`replicated.core.Release.promote`.
+
+        """
+        data = _promote_data(channels, required, release_notes, label)
+        await self._request('POST', release.url + '/promote', 204, data=data)
+
+    async def refresh(self, release):
+        """Refresh the configuration and mutable attributes of
+        ``release``.
+
+        See :meth:`replicated.core.Release.refresh`.
+
+        """
+        response_json = await self._request(
+            'GET', release.url + '/properties', 200)
+        release._config = response_json['Config']
+        release.created_at = response_json['CreatedAt']
+        release.edited_at = response_json['EditedAt']
+
+    async def set_config(self, release, new_yaml):
+        """Update the configuration YAML of ``release``.
+
+        This is the equivalent of setting
+        :attr:`replicated.core.Release.config`.
+
+        """
+        if not isinstance(new_yaml, six.text_type):
+            raise ValueError('Expected unicode text')
+        release._config = None
+        release._config_digest = None
+        version = extract_version(new_yaml)
+        async with self.session.put(
+                release.url + '/raw', data=new_yaml,
+                headers={'Content-Type': 'application/yaml'}) as response:
+            if response.status != 200:
+                raise ReplicatedError(
+                    await response.text(), response.status)
+        release.version = version
+        await self.refresh(release)
+
+    async def archive(self, release):
+        """Archive ``release``.
+
+        """
+        await self._request('POST', release.url + '/archive', 204)
+
+    async def create_license(self, channel, assignee, update_policy=None):
+        """Create a license for ``assignee`` on ``channel``.
+
+        See :meth:`replicated.core.Channel.create_license`.
+
+        """
+        if channel.app._license_index is None:
+            await self.get_licenses(channel.app)
+        license_index = channel.app._license_index
+        if license_index.find(assignee, channel) is not None:
+            raise ValueError(
+                'License already exists for {} and channel {}'.format(
+                    assignee, channel))
+        data = _create_license_data(channel, assignee, update_policy)
+        license_json = await self._request(
+            'POST', self.base_url + '/license', 201, data=data)
+        license = License.from_json(
+            license_json, app=channel.app, channel=channel, session=None)
+        license_index.add(license)
+        return license
@@ -0,0 +1,185 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Vectorized analytics over the licenses of an application.
+
+This module requires NumPy, which can be installed with the
+``analytics`` extra::
+
+    pip install python-replicated[analytics]
+
+Licenses are exported to a NumPy structured array, one record per
+license, with dates parsed to ``datetime64[s]``::
+
+    >>> licenses = license_array(app.license_table())
+    >>> licenses['active_instance_count'].sum()
+    >>> group_by(licenses, 'channel_id')
+
+"""
+import numpy as np
+import six
+
+from .table import LicenseTable
+
+
+#: The date columns of a license array, parsed to ``datetime64[s]``.
+DATE_FIELDS = ('grant_date', 'expire_date', 'revokation_date', 'last_sync')
+
+#: The numeric columns aggregated by :func:`~group_by` by default.
+COUNT_FIELDS = (
+    'inactive_instance_count', 'active_instance_count',
+    'untracked_instance_count')
+
+LICENSE_DTYPE = np.dtype([
+    ('id', object),
+    ('channel_id', object),
+    ('assignee', object),
+    ('update_policy', object),
+    ('archived', np.bool_),
+    ('anonymous', np.bool_),
+    ('require_activation', np.bool_),
+    ('is_instance_tracked', np.bool_),
+    ('grant_date', 'datetime64[s]'),
+    ('expire_date', 'datetime64[s]'),
+    ('revokation_date', 'datetime64[s]'),
+    ('last_sync', 'datetime64[s]'),
+    ('inactive_instance_count', np.int64),
+    ('active_instance_count', np.int64),
+    ('untracked_instance_count', np.int64),
+])
+
+
+def parse_dates(values):
+    """Parse Replicated API timestamps to a ``datetime64[s]`` array.
+
+    Missing values (``None`` or empty strings) become ``NaT``.
+    Timestamps are in UTC; the time zone designator is dropped.
+
+    """
+    return np.array(
+        [value[:19] if value else 'NaT' for value in values],
+        dtype='datetime64[s]')
+
+
+def license_array(licenses):
+    """Export licenses to a NumPy structured array.
+
+    Parameters
+    ----------
+    licenses : LicenseTable : list
+        A :class:`~replicated.table.LicenseTable`, as returned by
+        :meth:`App.license_table`, or a list of :class:`~License`
+        objects, as returned by :attr:`App.licenses`.
+
+    Returns
+    -------
+    array : numpy.ndarray
+        A structured array of :data:`~LICENSE_DTYPE` with one record
+        per license.
+
+    """
+    if isinstance(licenses, LicenseTable):
+        columns = dict(
+            (name, licenses.column(name)) for name in LICENSE_DTYPE.names)
+    else:
+        licenses = list(licenses)
+        columns = dict(
+            (name, [getattr(license, name) for license in licenses])
+            for name in LICENSE_DTYPE.names if name != 'channel_id')
+        columns['channel_id'] = [
+            license.channel.id for license in licenses]
+        columns['update_policy'] = [
+            license.update_policy.value for license in licenses]
+
+    array = np.empty(len(columns['id']), dtype=LICENSE_DTYPE)
+    for name in LICENSE_DTYPE.names:
+        if name in DATE_FIELDS:
+            array[name] = parse_dates(columns[name])
+        elif LICENSE_DTYPE[name] == object:
+            array[name] = np.array(columns[name], dtype=object)
+        else:
+            array[name] = np.asarray(columns[name])
+    return array
+
+
+def group_by(licenses, by, fields=COUNT_FIELDS, mask=None):
+    """Aggregate a license array by the values of one or more fields.
+
+    Parameters
+    ----------
+    licenses : numpy.ndarray
+        A license array, as returned by :func:`~license_array`.
+    by : str : tuple
+        The field, or fields, whose values define the groups, such as
+        ``'channel_id'`` or ``('channel_id', 'update_policy')``.
+    fields : tuple
+        The numeric fields to sum in each group.
+    mask : numpy.ndarray
+        If given, a boolean array selecting the licenses to
+        aggregate, such as ``~licenses['archived']``.
+
+    Returns
+    -------
+    groups : dict
+        A mapping of each group key to a dictionary with the number of
+        licenses (``'licenses'``) and the sum of each of ``fields``.
+
+    """
+    if mask is not None:
+        licenses = licenses[mask]
+    if isinstance(by, six.string_types):
+        keys = licenses[by]
+    else:
+        keys = np.empty(len(licenses), dtype=object)
+        keys[:] = list(zip(*(licenses[name] for name in by)))
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique))
+    sums = dict(
+        (name, np.bincount(
+            inverse, weights=licenses[name], minlength=len(unique)))
+        for name in fields)
+    groups = {}
+    for index, key in enumerate(unique.tolist()):
+        group = {'licenses': int(counts[index])}
+        for name in fields:
+            group[name] = int(sums[name][index])
+        groups[key] = group
+    return groups
+
+
+def expiry_forecast(licenses, unit='M', start=None, periods=12, mask=None):
+    """Count the licenses expiring in each of the coming periods.
+
+    Parameters
+    ----------
+    licenses : numpy.ndarray
+        A license array, as returned by :func:`~license_array`.
+    unit : str
+        The NumPy datetime unit of a period, such as ``'D'``, ``'W'``
+        or ``'M'``.
+    start : numpy.datetime64
+        The start of the first period.  The default is the current
+        period.
+    periods : int
+        The number of periods to forecast.
+    mask : numpy.ndarray
+        If given, a boolean array selecting the licenses to count.
+
+    Returns
+    -------
+    periods : numpy.ndarray
+        The start of each period, as ``datetime64[unit]``.
+    counts : numpy.ndarray
+        The number of licenses expiring in each period.
+
+    """
+    if mask is not None:
+        licenses = licenses[mask]
+    if start is None:
+        start = np.datetime64('now')
+    start = np.datetime64(start, unit)
+    expire = licenses['expire_date']
+    expire = expire[~np.isnat(expire)].astype('datetime64[{0}]'.format(unit))
+    offsets = (expire - start).astype(np.int64)
+    offsets = offsets[(offsets >= 0) & (offsets < periods)]
+    counts = np.bincount(offsets, minlength=periods)
+    return start + np.arange(periods), counts
@@ -0,0 +1,134 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Helpers to run many Vendor API operations with bounded concurrency.
+
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import time
+
+from attr import attributes, attr
+import requests
+
+from .exceptions import ReplicatedError
+from .retry import TRANSIENT_STATUS_CODES, backoff_delay
+
+
+def is_transient(error):
+    """Return ``True`` if ``error`` is a failure that may succeed when
+    retried.
+
+    """
+    if isinstance(error, ReplicatedError):
+        return error.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(
+        error, (requests.ConnectionError, requests.Timeout))
+
+
+@attributes
+class BatchResult(object):
+    """The outcome of one item of a batch operation.
+
+    """
+
+    #: The item that was processed.
+    item = attr()
+
+    #: The value returned for the item, if it succeeded.
+    value = attr(default=None)
+
+    #: The exception raised for the item, if it failed.
+    error = attr(default=None)
+
+    #: The number of attempts made.
+    attempts = attr(default=1, repr=False)
+
+    @property
+    def ok(self):
+        """``True`` if the item succeeded.
+
+        """
+        return self.error is None
+
+
+def run_batch(func, items, max_workers=4, retries=2, backoff=0.5,
+              progress=None, transient=is_transient):
+    """Call ``func`` on each of ``items`` using a bounded thread pool.
+
+    Failures do not stop the batch: each item gets a
+    :class:`~BatchResult` recording either the value returned by
+    ``func`` or the exception it raised.  Transient failures (see
+    :func:`~is_transient`) are retried with jittered exponential
+    backoff.
+
+    ``items`` is consumed lazily, keeping at most ``2 * max_workers``
+    items in flight, so it may be a generator over a long sequence.
+
+    Parameters
+    ----------
+    func : callable
+        The operation to apply to each item.
+    items : iterable
+        The items to process.
+    max_workers : int
+        The maximum number of concurrent calls to ``func``.
+    retries : int
+        The maximum number of times to retry an item after a
+        transient failure.
+    backoff : float
+        The base delay, in seconds, before the first retry.  The
+        delay doubles with each retry.
+    progress : callable
+        If given, called with each :class:`~BatchResult` as it
+        completes.
+    transient : callable
+        Return ``True`` if the exception it is called with may be
+        retried.  The default is :func:`~is_transient`.
+
+    Returns
+    -------
+    results : list
+        The :class:`~BatchResult` of each item, in the order of
+        ``items``.
+
+    """
+    if max_workers < 1:
+        raise ValueError('Expected a positive number of workers')
+    results = []
+    pending = {}
+
+    def collect(futures):
+        for future in futures:
+            result = future.result()
+            results.append((pending.pop(future), result))
+            if progress is not None:
+                progress(result)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, item in enumerate(items):
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = executor.submit(
+                _attempt, func, item, retries, backoff, transient)
+            pending[future] = index
+        collect(wait(pending).done)
+
+    results.sort(key=lambda indexed: indexed[0])
+    return [result for _, result in results]
+
+
+def _attempt(func, item, retries, backoff, transient):
+    """Call ``func(item)``, retrying transient failures.
+
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            value = func(item)
+        except Exception as error:
+            if attempts > retries or not transient(error):
+                return BatchResult(item, error=error, attempts=attempts)
+            time.sleep(backoff_delay(attempts, backoff))
+        else:
+            return BatchResult(item, value=value, attempts=attempts)
@@ -0,0 +1,336 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+from collections import OrderedDict
+import os
+import sqlite3
+import threading
+import time
+
+from ._compat import monotonic as _monotonic
+
+
+class _LRUCache(object):
+    """A thread-safe mapping of URLs to values that evicts the least
+    recently used entry when full.
+
+    """
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('Expected a positive cache size')
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, url):
+        with self._lock:
+            value = self._entries.pop(url, None)
+            if value is not None:
+                self._entries[url] = value
+            return value
+
+    def _set(self, url, value):
+        with self._lock:
+            self._entries.pop(url, None)
+            self._entries[url] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix=None):
+        """Discard cached responses.
+
+        Parameters
+        ----------
+        prefix : str
+            If given, only responses for URLs starting with ``prefix``
+            are discarded.  The default is to discard all responses.
+
+        """
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for url in [url for url in self._entries
+                        if url.startswith(prefix)]:
+                del self._entries[url]
+
+
+class ResponseCache(_LRUCache):
+    """A size-bounded, time-limited cache of Vendor API responses.
+
+    Responses are cached by URL for a time-to-live that depends on the
+    endpoint the URL belongs to.  When the cache is full, the least
+    recently used response is evicted.
+
+    A :class:`~ResponseCache` is used by passing it to
+    :class:`~replicated.core.ReplicatedVendorAPI`::
+
+        >>> api = ReplicatedVendorAPI(token, cache=ResponseCache())
+
+    The API client invalidates the affected responses whenever it makes
+    a request that modifies data.  Changes made by other clients are
+    only seen once the cached responses expire or are invalidated
+    explicitly with :meth:`~ResponseCache.invalidate`.
+
+    """
+
+    #: The default time-to-live, in seconds, of each endpoint.
+    #: Responses of endpoints not listed here are not cached.
+    default_ttls = {
+        '/apps': 60,
+        '/app/{app_id}/channels': 60,
+        '/app/{app_id}/licenses': 60,
+        '/app/{app_id}/releases': 30,
+        '/app/{app_id}/releases/paged': 30,
+        '/app/{app_id}/{sequence}/properties': 30,
+        '/licensekey/{license_id}': 300,
+    }
+
+    def __init__(self, maxsize=256, ttls=None, clock=_monotonic):
+        """Create a :class:`~ResponseCache`.
+
+        Parameters
+        ----------
+        maxsize : int
+            The maximum number of responses to keep.
+        ttls : dict
+            A mapping of endpoint templates (see
+            :func:`replicated.session.endpoint_template`) to
+            time-to-live in seconds.  These update
+            :attr:`~ResponseCache.default_ttls`; a time-to-live of
+            ``0`` disables caching of an endpoint.
+        clock : callable
+            A function returning the current time in seconds.
+
+        """
+        super(ResponseCache, self).__init__(maxsize)
+        self.ttls = dict(self.default_ttls)
+        if ttls is not None:
+            self.ttls.update(ttls)
+        self._clock = clock
+
+    def ttl(self, endpoint):
+        """The time-to-live, in seconds, of responses from ``endpoint``.
+
+        """
+        return self.ttls.get(endpoint, 0)
+
+    def get(self, url):
+        """Return the cached response for ``url``, or ``None`` if there is
+        no unexpired response.
+
+        """
+        entry = self._get(url)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= self._clock():
+            return None
+        return response
+
+    def set(self, url, endpoint, response):
+        """Cache ``response`` for ``url``, using the time-to-live of
+        ``endpoint``.
+
+        """
+        ttl = self.ttl(endpoint)
+        if ttl > 0:
+            self._set(url, (self._clock() + ttl, response))
+
+
+class ValidatorCache(_LRUCache):
+    """A size-bounded cache of Vendor API responses carrying ``ETag`` or
+    ``Last-Modified`` validators.
+
+    When a :class:`~ValidatorCache` is passed to
+    :class:`~replicated.core.ReplicatedVendorAPI`, ``GET`` requests for
+    URLs with a cached response are made conditional.  If the API
+    replies ``304 Not Modified``, the cached response, including its
+    already decoded JSON, is reused instead of downloading the body
+    again::
+
+        >>> api = ReplicatedVendorAPI(token, validators=ValidatorCache())
+
+    Unlike :class:`~ResponseCache`, this never serves stale data: every
+    read still makes a request.
+
+    """
+
+    def __init__(self, maxsize=1024):
+        """Create a :class:`~ValidatorCache`.
+
+        Parameters
+        ----------
+        maxsize : int
+            The maximum number of responses to keep.
+
+        """
+        super(ValidatorCache, self).__init__(maxsize)
+
+    def get(self, url):
+        """Return the cached response for ``url``, or ``None``.
+
+        """
+        return self._get(url)
+
+    def set(self, url, response):
+        """Cache ``response`` for ``url`` if it carries validators.
+
+        """
+        headers = response.headers
+        if 'ETag' in headers or 'Last-Modified' in headers:
+            self._set(url, response)
+
+    @staticmethod
+    def conditional_headers(response, headers=None):
+        """Return a copy of ``headers`` extended with the conditional
+        request headers that revalidate ``response``.
+
+        """
+        headers = dict(headers or {})
+        etag = response.headers.get('ETag')
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        last_modified = response.headers.get('Last-Modified')
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+class ConfigCache(object):
+    """A persistent, size-bounded cache of release configurations.
+
+    The configuration of a release that is no longer editable never
+    changes, so it can be kept across processes.  Configurations are
+    stored in a SQLite database keyed by application ID, release
+    sequence and edit time; when the stored configurations exceed
+    ``max_bytes``, the least recently read ones are evicted.
+
+    A :class:`~ConfigCache` is used by passing it to
+    :class:`~replicated.core.ReplicatedVendorAPI`, which then consults
+    it when reading :attr:`Release.config` of non-editable releases::
+
+        >>> api = ReplicatedVendorAPI(
+        ...     token, config_cache=ConfigCache('~/.cache/replicated.db'))
+
+    The database may be shared by several processes.
+
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS configs (
+            app_id TEXT NOT NULL,
+            sequence INTEGER NOT NULL,
+            edited_at TEXT NOT NULL,
+            config TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            accessed REAL NOT NULL,
+            PRIMARY KEY (app_id, sequence, edited_at)
+        );
+        CREATE INDEX IF NOT EXISTS configs_accessed ON configs (accessed);
+    """
+
+    def __init__(self, path, max_bytes=64 * 2 ** 20, clock=time.time):
+        """Create a :class:`~ConfigCache`.
+
+        Parameters
+        ----------
+        path : str
+            The path of the SQLite database, created if it does not
+            exist.  ``':memory:'`` keeps the cache in memory.
+        max_bytes : int
+            The maximum total size of the cached configurations.
+        clock : callable
+            A function returning the current time in seconds, used to
+            order evictions.
+
+        """
+        if max_bytes < 1:
+            raise ValueError('Expected a positive cache size')
+        if path != ':memory:':
+            path = os.path.expanduser(path)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(self._SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM configs').fetchone()[0]
+
+    def get(self, app_id, sequence, edited_at):
+        """Return the cached configuration of a release, or ``None``.
+
+        """
+        with self._lock, self._connection as connection:
+            row = connection.execute(
+                'SELECT config FROM configs '
+                'WHERE app_id = ? AND sequence = ? AND edited_at = ?',
+                (app_id, sequence, edited_at)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                'UPDATE configs SET accessed = ? '
+                'WHERE app_id = ? AND sequence = ? AND edited_at = ?',
+                (self._clock(), app_id, sequence, edited_at))
+        return row[0]
+
+    def set(self, app_id, sequence, edited_at, config):
+        """Cache the configuration of a release, evicting the least
+        recently read configurations if the cache is full.
+
+        """
+        size = len(config.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock, self._connection as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO configs VALUES (?, ?, ?, ?, ?, ?)',
+                (app_id, sequence, edited_at, config, size, self._clock()))
+            total = connection.execute(
+                'SELECT SUM(size) FROM configs').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for key in connection.execute(
+                    'SELECT app_id, sequence, edited_at, size FROM configs '
+                    'ORDER BY accessed'):
+                evicted.append(key[:3])
+                total -= key[3]
+                if total <= self.max_bytes:
+                    break
+            connection.executemany(
+                'DELETE FROM configs '
+                'WHERE app_id = ? AND sequence = ? AND edited_at = ?',
+                evicted)
+
+    def invalidate(self, app_id=None):
+        """Discard cached configurations.
+
+        Parameters
+        ----------
+        app_id : str
+            If given, only the configurations of this application are
+            discarded.  The default is to discard all configurations.
+
+        """
+        with self._lock, self._connection as connection:
+            if app_id is None:
+                connection.execute('DELETE FROM configs')
+            else:
+                connection.execute(
+                    'DELETE FROM configs WHERE app_id = ?', (app_id,))
+
+    def close(self):
+        """Close the database.
+
+        """
+        with self._lock:
+            self._connection.close()
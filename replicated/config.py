@@ -0,0 +1,151 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Comparison of release configurations.
+
+Release configurations are compared through a digest of their
+canonical form, ignoring the keys that change with every release
+(:data:`~VOLATILE_KEYS`)::
+
+    >>> configs_equal(new_yaml, release.config)
+    >>> config_digest(new_yaml) == release.config_digest
+
+Digests are memoized by configuration text, so each configuration is
+only parsed once per process.
+
+"""
+import hashlib
+import json
+import re
+
+import ruamel.yaml
+import six
+
+from .cache import _LRUCache
+
+
+#: The top-level keys ignored when comparing configurations.
+VOLATILE_KEYS = frozenset(['version', 'release_notes'])
+
+_DOCUMENT_END = re.compile(r'^(---|\.\.\.)(\s|$)', re.MULTILINE)
+
+# Blank lines, comments and directives before the first document marker.
+_PREAMBLE = re.compile(r'(?:[ \t]*(?:[#%].*)?\n)*')
+
+_VERSION = re.compile(r'^version[ \t]*:[ \t]*(?P<value>.*?)[ \t]*$',
+                      re.MULTILINE)
+
+_COMMENT = re.compile(r'[ \t]+#.*$')
+
+_NULLS = frozenset(['~', 'null', 'Null', 'NULL'])
+
+_digests = _LRUCache(1024)
+
+
+def _first_document(config):
+    """Return the text of the first YAML document of ``config``.
+
+    """
+    start = _PREAMBLE.match(config).end()
+    match = _DOCUMENT_END.match(config, start)
+    if match is not None:
+        config = config[match.end():]
+    match = _DOCUMENT_END.search(config)
+    if match is not None:
+        config = config[:match.start()]
+    return config
+
+
+def extract_version(config):
+    """Return the ``version`` of a release configuration, or ``''`` if
+    it has none.
+
+    The version is read from the ``version:`` line of the first YAML
+    document without parsing the whole configuration.  Values that
+    are not written as a single-line scalar are read with a full
+    parse.
+
+    """
+    document = _first_document(config)
+    matches = _VERSION.findall(document)
+    if not matches:
+        return _parse_version(config)
+    value = matches[0]
+    if len(matches) > 1 or not value or value[0] in '|>&*!{[':
+        return _parse_version(config)
+    if value[0] in '"\'':
+        return ruamel.yaml.safe_load(value)
+    value = _COMMENT.sub('', value)
+    if value in _NULLS:
+        return _parse_version(config)
+    return value
+
+
+def _parse_version(config):
+    document = next(iter(ruamel.yaml.safe_load_all(config)), None)
+    if not isinstance(document, dict):
+        return u''
+    version = document.get('version')
+    return u'' if version is None else six.text_type(version)
+
+
+def _canonical_key(key):
+    if isinstance(key, six.string_types):
+        return u'str:' + key
+    return u'{0}:{1!r}'.format(type(key).__name__, key)
+
+
+def _canonical(value):
+    """Return ``value`` with the keys of its mappings made distinct,
+    sortable JSON strings.
+
+    Each key is prefixed with its type, so that keys of different
+    types never compare or collide, e.g. ``1`` and ``'1'``.
+
+    """
+    if isinstance(value, dict):
+        return dict((_canonical_key(key), _canonical(item))
+                    for key, item in value.items())
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def config_digest(config, ignore=VOLATILE_KEYS):
+    """Return a digest of the content of a release configuration.
+
+    Configurations that differ only by formatting, comments, key order
+    or the top-level keys in ``ignore`` have the same digest.
+
+    Parameters
+    ----------
+    config : str
+        The release configuration YAML.
+    ignore : frozenset
+        The top-level keys of the first document to ignore.
+
+    """
+    ignore = frozenset(ignore)
+    raw = config.encode('utf-8') if isinstance(config, six.text_type) \
+        else config
+    key = (hashlib.sha1(raw).digest(), ignore)
+    digest = _digests._get(key)
+    if digest is None:
+        documents = list(ruamel.yaml.safe_load_all(config))
+        if documents and isinstance(documents[0], dict):
+            documents[0] = dict(
+                (name, value) for name, value in documents[0].items()
+                if name not in ignore)
+        canonical = json.dumps(
+            _canonical(documents), sort_keys=True, separators=(',', ':'),
+            default=str)
+        digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        _digests._set(key, digest)
+    return digest
+
+
+def configs_equal(first, second, ignore=VOLATILE_KEYS):
+    """Return whether two release configurations have the same content,
+    ignoring the top-level keys in ``ignore``.
+
+    """
+    return config_digest(first, ignore) == config_digest(second, ignore)
@@ -1,17 +1,28 @@
 #  Copyright (c) 2016 by Enthought, Inc.
 #  All rights reserved.
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import datetime
 import enum
+import io
 import json
+import os
+import re
+import threading
 
-import ruamel.yaml
-
-from attr import attributes, attr
+from attr import Factory, attributes, attr
 from requests.utils import default_user_agent as requests_user_agent
-import requests
 import six
 
 from . import __version__
+from .batch import is_transient, run_batch
+from .config import config_digest, extract_version
 from .exceptions import ReplicatedError
+from .metrics import RequestMetrics, RequestTally
+from .retry import RetryPolicy
+from .session import (
+    VendorSession, _bound_session, iter_json, keepalive_socket_options)
+from .table import LicenseTable
 
 
 def default_user_agent(base=None):
@@ -42,7 +53,124 @@ class NewReleaseSource(enum.Enum):
     latest = 'latest'
 
 
-@attributes
+def _create_release_data(source):
+    """Build the request body used to create a new release from
+    ``source``.
+
+    """
+    if not isinstance(source, (NewReleaseSource, Release)):
+        raise ValueError(
+            'Expected a NewReleaseSource or Release, '
+            'got {0}: {1!r}'.format(
+                type(source), source))
+    data = {}
+    if source == NewReleaseSource.latest:
+        data['source'] = source.value
+    elif isinstance(source, Release):
+        data['source'] = 'copy'
+        data['sourcedata'] = source.sequence
+    return data
+
+
+def _promote_data(channels, required=True, release_notes=None, label=None):
+    """Build the request body used to promote a release to
+    ``channels``.
+
+    """
+    if len(channels) == 0:
+        raise ValueError('Expected at least one channel')
+    data = {
+        'channels': [channel.id for channel in channels],
+        'required': required,
+    }
+    if release_notes is not None:
+        data['release_notes'] = release_notes
+    if label is not None:
+        data['label'] = label
+    return data
+
+
+def _app_criterion(id=None, name=None, slug=None):
+    """Return the ``(field, value)`` pair identifying an application
+    by exactly one of its ID, name or slug.
+
+    """
+    criteria = [
+        (field, value)
+        for field, value in (('id', id), ('name', name), ('slug', slug))
+        if value is not None
+    ]
+    if len(criteria) != 1:
+        raise TypeError('Expected exactly one of id, name or slug')
+    return criteria[0]
+
+
+# The UTC offset of an ISO 8601 date and time, if any.
+_UTC_OFFSET = re.compile(r'T[0-9:.]*(?P<offset>Z|[+-][0-9:]+)?$')
+
+_ZERO_OFFSETS = frozenset(['Z', '+00', '+0000', '+00:00', '-00:00'])
+
+
+def _utc_timestamp(value):
+    """Return a date, a date and time, or an ISO 8601 string, as an
+    ISO 8601 UTC time without offset, such as ``'2016-06-30T12:00:00'``.
+
+    Naive times are assumed to be in UTC.
+
+    """
+    if isinstance(value, six.string_types):
+        match = _UTC_OFFSET.search(value)
+        offset = None if match is None else match.group('offset')
+        if offset is not None:
+            if offset not in _ZERO_OFFSETS:
+                raise ValueError(
+                    'Expected a UTC time, got {0!r}'.format(value))
+            value = value[:match.start('offset')]
+        return value[:19]
+    if isinstance(value, datetime.datetime):
+        offset = value.utcoffset()
+        if offset is not None:
+            value = value.replace(tzinfo=None) - offset
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%dT00:00:00')
+    raise TypeError('Expected a date, a datetime or a string')
+
+
+def _batch_transient(session):
+    """Return the predicate of the failures that a batch operation
+    making requests through ``session`` should retry.
+
+    A ``429`` response has already been retried by the
+    :class:`~replicated.retry.RetryPolicy` of the session, if it has
+    one, so it is not retried again by the batch.
+
+    """
+    retry = getattr(session, 'retry', None)
+    if retry is None or 429 not in retry.status_codes:
+        return is_transient
+    return lambda error: is_transient(error) and not (
+        isinstance(error, ReplicatedError) and error.status_code == 429)
+
+
+def _create_license_data(channel, assignee, update_policy=None):
+    """Build the request body used to create a license for
+    ``assignee`` on ``channel``.
+
+    """
+    if update_policy is None:
+        update_policy = License.UpdatePolicy.manual
+    return {
+        'app_id': channel.app.id,
+        'channel_id': channel.id,
+        'update_policy': update_policy.value,
+        'require_activation': False,
+        'assignee': assignee,
+        'expiration_policy': 'ignore',
+    }
+
+
+@attributes(slots=True)
 class App(object):
     """A Replicated-based application.
 
@@ -67,6 +195,19 @@ class App(object):
     #: application.
     _session = attr(cmp=False, repr=False, hash=False, init=False)
 
+    #: INTERNAL: The index of the application's licenses.
+    _license_index = attr(
+        default=None, cmp=False, repr=False, hash=False, init=False)
+
+    #: INTERNAL: The ``channels`` tuple that ``_channels_by_id`` was
+    #: built from.
+    _indexed_channels = attr(
+        default=None, cmp=False, repr=False, hash=False, init=False)
+
+    #: INTERNAL: The application's channels by ID.
+    _channels_by_id = attr(
+        default=None, cmp=False, repr=False, hash=False, init=False)
+
     @classmethod
     def from_json(cls, app_channels_json, session=None):
         """Create a new :class:`~App` instance from JSON returned by the
@@ -99,10 +240,25 @@ class App(object):
             Channel.from_json(ch, app=instance, session=session)
             for ch in app_channels_json['Channels'])
         instance.channels = channels
-        instance._session = session
+        instance._session = _bound_session(session)
 
         return instance
 
+    @property
+    def channels_by_id(self):
+        """A mapping of channel IDs to the application's channels.
+
+        The mapping is built on first access and rebuilt whenever
+        :attr:`~App.channels` is replaced, for example by
+        :meth:`~App.create_channel`.  It should not be modified.
+
+        """
+        channels = self.channels
+        if self._indexed_channels is not channels:
+            self._channels_by_id = dict((ch.id, ch) for ch in channels)
+            self._indexed_channels = channels
+        return self._channels_by_id
+
     @property
     def releases(self):
         """Query the application releases.
@@ -119,10 +275,26 @@ class App(object):
 
             >>> list(app.releases)
 
+        Iteration is lazy: releases are fetched newest first, one page
+        at a time, so stopping early avoids fetching the full release
+        history::
+
+            >>> next(rel for rel in app.releases if rel.sequence == 42)
+
+        To control the page size, use :meth:`ReleasesSlice.iterate`::
+
+            >>> for release in app.releases.iterate(page_size=20):
+            ...     pass
+
         To retrieve a subset of releases, slice the iterable as usual::
 
             >>> app.releases[2:4]
 
+        Large listings can be fetched with concurrent page requests
+        using :meth:`ReleasesSlice.prefetch`::
+
+            >>> app.releases.prefetch(max_workers=8)[0:5000]
+
         """
         return ReleasesSlice(self, self._session)
 
@@ -130,19 +302,55 @@ class App(object):
     def licenses(self):
         """List the licenses associated with the application.
 
+        """
+        licenses = list(self.iter_licenses())
+        self._license_index = LicenseIndex(licenses)
+        return licenses
+
+    def iter_licenses(self):
+        """Iterate over the licenses associated with the application.
+
+        With a client created with ``stream_json=True``, each
+        :class:`~License` is yielded as soon as its JSON has been read
+        from the response, without waiting for the whole license list
+        to be downloaded and decoded.
+
         """
         url = self.url + '/licenses'
-        response = self._session.get(url)
-        if response.status_code != 200:
-            raise ReplicatedError(response.text)
-        response_json = response.json()
-        channels = {ch.id: ch for ch in self.channels}
-        return [
-            License.from_json(
+        channels = self.channels_by_id
+        for item in iter_json(self._session, url):
+            yield License.from_json(
                 item, app=self, session=self._session,
                 channel=channels[item['ChannelId']])
-            for item in response_json
-        ]
+
+    def license_table(self):
+        """Fetch the licenses associated with the application as a
+        column-oriented :class:`~replicated.table.LicenseTable`.
+
+        This uses much less memory than :attr:`~App.licenses` for
+        applications with many licenses, since no :class:`~License`
+        objects are created until rows of the table are accessed.
+
+        """
+        url = self.url + '/licenses'
+        return LicenseTable.from_json(
+            iter_json(self._session, url), app=self, session=self._session)
+
+    @property
+    def license_index(self):
+        """A :class:`~LicenseIndex` of the licenses associated with the
+        application.
+
+        The index is built from the license list on first access and
+        rebuilt each time :attr:`~App.licenses` is fetched.
+        Licenses created through :meth:`Channel.create_license` are
+        added to it, so repeated lookups do not fetch the license list
+        again.
+
+        """
+        if self._license_index is None:
+            self._license_index = LicenseIndex(self.iter_licenses())
+        return self._license_index
 
     def create_release(self, source=NewReleaseSource.latest):
         """Create a new :class:`~Release`.
@@ -158,36 +366,254 @@ class App(object):
         If ``source`` is an instance of :class:`~Release`, then that
         release will be used as the source of the configuration.
 
+        The returned release is built from the response to the create
+        request, so it is the release created by this call even when
+        other clients are creating releases of the same application.
+
         Parameters
         ----------
         source : NewReleaseSource : Release
             The source of configuration for the new release.
 
         """
-        if not isinstance(source, (NewReleaseSource, Release)):
-            raise ValueError(
-                'Expected a NewReleaseSource or Release, '
-                'got {0}: {1!r}'.format(
-                    type(source), source))
+        new_release = self._post_release(source)
+        if new_release.created_at is None:
+            new_release.refresh()
+        return new_release
+
+    def _post_release(self, source):
+        """Create a new release, without fetching the attributes missing
+        from the response.
+
+        """
         url = self.url + '/release'
-        data = {}
-        if source == NewReleaseSource.latest:
-            data['source'] = source.value
-        elif isinstance(source, Release):
-            data['source'] = 'copy'
-            data['sourcedata'] = source.sequence
+        data = _create_release_data(source)
         response = self._session.post(
             url,
             data=json.dumps(data),
             headers={'Content-Type': 'application/json'},
         )
         if response.status_code != 201:
-            raise ReplicatedError(response.text)
-        response_json = response.json()
+            raise ReplicatedError(response.text, response.status_code)
+        return Release.from_create_json(response.json(), self, self._session)
 
-        new_release, = self.releases[:1]
-        assert new_release.sequence == response_json['Sequence']
-        return new_release
+    def create_licenses(self, assignments, update_policy=None,
+                        max_workers=4, retries=0):
+        """Create licenses for many ``(assignee, channel)`` pairs.
+
+        Existing licenses are checked once against
+        :attr:`~App.license_index`; pairs that already have a license,
+        or that are repeated in ``assignments``, are skipped.  The
+        remaining licenses are created concurrently by up to
+        ``max_workers`` threads, and a failure does not stop the
+        others::
+
+            >>> report = app.create_licenses(
+            ...     (customer, channel) for customer in customers)
+            >>> report.created, report.skipped, report.failed
+
+        Parameters
+        ----------
+        assignments : iterable
+            The ``(assignee, channel)`` pairs for which to create
+            licenses.
+        update_policy : License.UpdatePolicy
+            The update policy of the new licenses.  The default is
+            :attr:`License.UpdatePolicy.manual`.
+        max_workers : int
+            The maximum number of licenses created at once.
+        retries : int
+            The maximum number of retries after a transient failure.
+            The default is not to retry, since a request that failed
+            with a server error may still have created the license.
+
+        Returns
+        -------
+        report : LicenseBatchReport
+            The created licenses and the skipped and failed
+            assignments.
+
+        """
+        license_index = self.license_index
+        report = LicenseBatchReport()
+        pending = []
+        seen = set()
+        for assignee, channel in assignments:
+            key = (assignee, channel.id)
+            if key in seen or license_index.find(assignee, channel):
+                report.skipped.append((assignee, channel))
+            else:
+                seen.add(key)
+                pending.append((assignee, channel))
+
+        results = run_batch(
+            lambda assignment: assignment[1]._post_license(
+                assignment[0], update_policy),
+            pending, max_workers=max_workers, retries=retries,
+            transient=_batch_transient(self._session))
+        for result in results:
+            if result.ok:
+                report.created.append(result.value)
+            else:
+                assignee, channel = result.item
+                report.failed.append((assignee, channel, result.error))
+        return report
+
+    def fetch_license_keys(self, licenses=None, directory=None,
+                           max_workers=4, retries=None):
+        """Fetch the key values of many licenses concurrently.
+
+        The keys are fetched by up to ``max_workers`` threads sharing
+        the connection pool of the application's session, and are kept
+        on the :class:`~License` objects, so later access to
+        :attr:`License.value` makes no request.
+
+        Parameters
+        ----------
+        licenses : iterable
+            The :class:`~License` objects whose keys to fetch.  The
+            default is all licenses of the application.
+        directory : str
+            If given, each key is written to ``<license id>.rli`` in
+            this directory as soon as it is fetched.
+        max_workers : int
+            The maximum number of keys fetched at once.
+        retries : int
+            The maximum number of retries of each key after a
+            transient failure, on top of those made by the session.
+            The default is not to retry when the session has a
+            :class:`~replicated.retry.RetryPolicy`, which already
+            retries these requests, and to retry twice otherwise.
+
+        Returns
+        -------
+        results : list
+            A :class:`~replicated.batch.BatchResult` for each license,
+            in order, whose ``value`` is the license key.
+
+        """
+        if licenses is None:
+            licenses = self.licenses
+        if retries is None:
+            retries = 2 if getattr(self._session, 'retry', None) is None \
+                else 0
+
+        def fetch(license):
+            value = license.value
+            if directory is not None:
+                path = os.path.join(directory, '{}.rli'.format(license.id))
+                with io.open(path, 'w', encoding='utf-8') as fh:
+                    fh.write(value)
+            return value
+
+        return run_batch(
+            fetch, licenses, max_workers=max_workers, retries=retries)
+
+    def archive_releases(self, min_sequence=None, max_sequence=None,
+                         created_before=None, inactive=False, where=None,
+                         max_workers=4, retries=2, progress=None,
+                         page_size=None):
+        """Archive the releases matching all of the given criteria.
+
+        Releases are listed one page at a time, newest first, and the
+        matching releases of each page are archived by up to
+        ``max_workers`` threads before the next page is requested, so
+        that archived releases do not shift the pages still to be
+        listed; a page on which an archive failed is listed again.
+        Listing stops once ``min_sequence`` is passed, so archiving a
+        range of recent releases does not list the whole release
+        history::
+
+            >>> results = app.archive_releases(
+            ...     max_sequence=4000, created_before='2016-01-01',
+            ...     inactive=True)
+
+        Parameters
+        ----------
+        min_sequence : int
+            If given, only archive releases with this sequence or
+            greater.
+        max_sequence : int
+            If given, only archive releases with this sequence or
+            less.
+        created_before : datetime.datetime : datetime.date : str
+            If given, only archive releases created before this time,
+            either as a :class:`~datetime.datetime` (in UTC if naive),
+            a :class:`~datetime.date` or an ISO 8601 UTC string such as
+            ``'2016-06-30T12:00:00'`` or ``'2016-06-30T12:00:00Z'``.
+            Strings with another UTC offset are rejected.
+        inactive : bool
+            If ``True``, only archive releases that are not active on
+            any channel.
+        where : callable
+            If given, only archive the :class:`~Release` objects for
+            which this returns ``True``.
+        max_workers : int
+            The maximum number of releases archived at once.
+        retries : int
+            The maximum number of retries of each release after a
+            transient failure.  ``429`` responses are left to the
+            session's :class:`~replicated.retry.RetryPolicy`.
+        progress : callable
+            If given, called with the
+            :class:`~replicated.batch.BatchResult` of each release as
+            it is archived.
+        page_size : int
+            The number of releases listed per page.  The default is
+            :attr:`ReleasesSlice.default_page_size`.
+
+        Returns
+        -------
+        results : list
+            A :class:`~replicated.batch.BatchResult` for each selected
+            release, newest first, whose ``item`` is the
+            :class:`~Release`.
+
+        """
+        if created_before is not None:
+            created_before = _utc_timestamp(created_before)
+
+        def selected(release):
+            if max_sequence is not None and release.sequence > max_sequence:
+                return False
+            if created_before is not None and (
+                    release.created_at is None or
+                    release.created_at[:19] >= created_before):
+                return False
+            if inactive and release._active_channel_ids:
+                return False
+            return where is None or where(release)
+
+        releases = self.releases
+        if page_size is None:
+            page_size = releases.page_size
+        results = []
+        attempted = set()
+        start = 0
+        while True:
+            page = [
+                Release.from_json(item, self, self._session)
+                for item in releases._iter_page(start, page_size)]
+            done = min_sequence is not None and (
+                not page or page[-1].sequence <= min_sequence)
+            batch = run_batch(
+                Release.archive,
+                (release for release in page
+                 if release.sequence not in attempted and
+                 selected(release) and (
+                     min_sequence is None or
+                     release.sequence >= min_sequence)),
+                max_workers=max_workers, retries=retries, progress=progress,
+                transient=_batch_transient(self._session))
+            results.extend(batch)
+            attempted.update(result.item.sequence for result in batch)
+            if done or len(page) < page_size:
+                return results
+            if all(result.ok for result in batch):
+                start += len(page) - len(batch)
+            # Otherwise a failed archive may still have removed the
+            # release, e.g. when a retry after a timeout got a 404, so
+            # the page is listed again instead of guessing its length.
 
     def create_channel(self, name):
         """Create a new channel.
@@ -213,7 +639,7 @@ class App(object):
             headers={'Content-Type': 'application/json'},
         )
         if response.status_code != 200:
-            raise ReplicatedError(response.text)
+            raise ReplicatedError(response.text, response.status_code)
         response_json = response.json()
         self.channels = channels = tuple(
             Channel.from_json(ch, app=self, session=self._session)
@@ -224,8 +650,121 @@ class App(object):
         except StopIteration:
             raise ValueError('Channel {} not created'.format(name))
 
+    def publish(self, config, channel, required=False, release_notes=None,
+                label=None, archive_previous=False):
+        """Publish a release configuration on a channel, unless the
+        release currently on the channel already has it.
+
+        The configurations are compared with
+        :func:`replicated.config.configs_equal`, ignoring their version
+        and release notes, so publishing an unchanged configuration
+        costs a single request.  Otherwise a new release is created
+        with ``config`` and promoted to ``channel``, and the previous
+        release of the channel is optionally archived.  Independent
+        steps run concurrently: the new configuration is digested while
+        the current one is fetched, and the new release is refreshed
+        while it is promoted.
+
+        The release currently on the channel is taken from
+        :attr:`Channel.release_sequence` without making a request, so
+        the application must be up to date: use an application just
+        fetched with :meth:`ReplicatedVendorAPI.get_app`, or fetch it
+        again if its channels may have been changed by someone else
+        since.  :meth:`~App.publish` keeps the channel up to date for
+        its own promotions.
 
-@attributes
+        Parameters
+        ----------
+        config : str
+            The release configuration YAML, as unicode text.
+        channel : Channel : str
+            The channel, or the name of the channel, on which to
+            publish.  A channel given by name is created if it does not
+            exist.
+        required : bool
+            ``True`` if the release will be a required upgrade for
+            customers.
+        release_notes : str
+            The release notes, if different from those of ``config``.
+        label : str
+            The release label, if different from the version of
+            ``config``.
+        archive_previous : bool
+            If ``True``, archive the release previously on the channel
+            once the new release is promoted, unless another channel of
+            the application still serves it.
+
+        Returns
+        -------
+        report : PublishReport
+            What was done.
+
+        """
+        if not isinstance(config, six.text_type):
+            raise ValueError('Expected unicode text')
+        report = PublishReport(channel=channel)
+        if isinstance(channel, six.string_types):
+            report.channel = next(
+                (ch for ch in self.channels if ch.name == channel), None)
+            if report.channel is None:
+                report.channel = self.create_channel(channel)
+                report.created_channel = True
+        channel = report.channel
+        previous = report.previous = self._channel_release(channel)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            digest = executor.submit(config_digest, config)
+            if previous is not None:
+                try:
+                    previous_digest = previous.config_digest
+                except ReplicatedError as error:
+                    # The previous release has been archived.
+                    if error.status_code != 404:
+                        raise
+                    previous = report.previous = None
+            if (previous is not None and
+                    previous_digest == digest.result()):
+                report.release = previous
+                return report
+
+            release = self._post_release(NewReleaseSource.none)
+            release._put_config(config)
+            refreshed = executor.submit(release.refresh)
+            release.promote(
+                [channel], required=required, release_notes=release_notes,
+                label=label)
+            if archive_previous and previous is not None and not any(
+                    ch.release_sequence == previous.sequence
+                    for ch in self.channels if ch.id != channel.id):
+                previous.archive()
+                report.archived = True
+            refreshed.result()
+
+        # The refresh may have raced with the promotion.
+        release.editable = False
+        release.active_channels = [channel]
+        channel.release_sequence = release.sequence
+        channel.release_label = label or release.version
+        report.release = release
+        report.created = True
+        return report
+
+    def _channel_release(self, channel):
+        """Return the :class:`~Release` currently on ``channel``, without
+        making any request, or ``None`` if there is none.
+
+        """
+        if not channel.release_sequence:
+            return None
+        return Release.from_create_json(
+            {'Sequence': channel.release_sequence,
+             'Version': channel.release_label,
+             'Editable': False,
+             'ActiveChannels': [{'Id': channel.id}]},
+            self, self._session)
+
+
+@attributes(slots=True)
 class Channel(object):
     """A distribution channel for an :class:`~App`.
 
@@ -284,7 +823,7 @@ class Channel(object):
             release_notes=channel_json['ReleaseNotes'],
             app=app,
         )
-        instance._session = session
+        instance._session = _bound_session(session)
         return instance
 
     @property
@@ -295,41 +834,58 @@ class Channel(object):
         return self.app.url + '/channel/{0}'.format(self.id)
 
     def create_license(self, assignee, update_policy=None):
-        """
+        """Create a new license for ``assignee`` on this channel.
+
+        Existing licenses are looked up in
+        :attr:`App.license_index`, which is fetched once and then
+        updated with each new license.
+
+        Parameters
+        ----------
+        assignee : str
+            The customer to whom the license is assigned.
+        update_policy : License.UpdatePolicy
+            The update policy of the license.  The default is
+            :attr:`License.UpdatePolicy.manual`.
 
         """
-        licenses = self.app.licenses
-        try:
-            next(l for l in licenses
-                 if l.assignee == assignee and l.channel == self)
-        except StopIteration:
-            pass
-        else:
+        if self.app.license_index.find(assignee, self) is not None:
             raise ValueError(
                 'License already exists for {} and channel {}'.format(
                     assignee, self))
+        return self._post_license(assignee, update_policy)
+
+    def create_licenses(self, assignees, update_policy=None, max_workers=4,
+                        retries=0):
+        """Create licenses for many assignees on this channel.
+
+        See :meth:`App.create_licenses`.
+
+        """
+        return self.app.create_licenses(
+            ((assignee, self) for assignee in assignees),
+            update_policy=update_policy, max_workers=max_workers,
+            retries=retries)
+
+    def _post_license(self, assignee, update_policy=None):
+        """Create a license for ``assignee`` without checking for an
+        existing license, and add it to :attr:`App.license_index`.
 
-        if update_policy is None:
-            update_policy = License.UpdatePolicy.manual
+        """
         url = ReplicatedVendorAPI.base_url + '/license'
-        data = {
-            'app_id': self.app.id,
-            'channel_id': self.id,
-            'update_policy': update_policy.value,
-            'require_activation': False,
-            'assignee': assignee,
-            'expiration_policy': 'ignore',
-        }
+        data = _create_license_data(self, assignee, update_policy)
         response = self._session.post(
             url, data=json.dumps(data),
             headers={'Content-Type': 'application/json'})
         if response.status_code != 201:
-            raise ReplicatedError(response.text)
-        return License.from_json(
+            raise ReplicatedError(response.text, response.status_code)
+        license = License.from_json(
             response.json(), app=self.app, channel=self, session=self._session)
+        self.app.license_index.add(license)
+        return license
 
 
-@attributes
+@attributes(slots=True)
 class Release(object):
     """A release of an application.
 
@@ -353,8 +909,16 @@ class Release(object):
     #: The time at which the release was last edited.
     edited_at = attr(repr=False)
 
-    #: Which channels the release is currently available through.
-    active_channels = attr(repr=False)
+    #: INTERNAL: The channels the release is currently available
+    #: through, or ``None`` until resolved from ``_active_channel_ids``.
+    _active_channels = attr(
+        default=None, cmp=False, repr=False, hash=False)
+
+    #: INTERNAL: The IDs of the channels the release is currently
+    #: available through.  Releases are compared by these rather than
+    #: by the channels themselves, so that comparing releases does not
+    #: resolve their channels.
+    _active_channel_ids = attr(default=None, repr=False, hash=False)
 
     #: INTERNAL: The requests Session used when making requests on the
     #: release.
@@ -363,6 +927,11 @@ class Release(object):
     #: INTERNAL: a caching optimization for the release configuration.
     _config = attr(default=None, cmp=False, repr=False, hash=False)
 
+    #: INTERNAL: The ``(edited_at, digest)`` of the release
+    #: configuration.
+    _config_digest = attr(
+        default=None, cmp=False, repr=False, hash=False, init=False)
+
     @classmethod
     def from_json(cls, release_json, app, session=None):
         """Create a new :class:`~Release` from JSON returned by the Replicated
@@ -381,11 +950,6 @@ class Release(object):
         """
         app_id = release_json['AppId']
         assert app_id == app.id
-        active_channel_ids = set(
-            c['Id'] for c in release_json['ActiveChannels'])
-        active_channels = [
-            c for c in app.channels if c.id in active_channel_ids
-        ]
         instance = cls(
             app=app,
             sequence=release_json['Sequence'],
@@ -393,11 +957,77 @@ class Release(object):
             editable=release_json['Editable'],
             created_at=release_json['CreatedAt'],
             edited_at=release_json['EditedAt'],
-            active_channels=active_channels,
+            active_channel_ids=tuple(
+                c['Id'] for c in release_json['ActiveChannels']),
         )
-        instance._session = session
+        instance._session = _bound_session(session)
         return instance
 
+    @classmethod
+    def from_create_json(cls, release_json, app, session=None):
+        """Create a new :class:`~Release` from the JSON response to a
+        create release request.
+
+        The response identifies the new release by its sequence number
+        and may omit some of the attributes present in release listings.
+        Missing attributes take the values of a new, unpromoted
+        release; if ``created_at`` is ``None`` on the returned
+        instance, :meth:`~Release.refresh` should be called to fetch
+        them.
+
+        Parameters
+        ----------
+        release_json : dict
+            The parsed JSON response from the Replicated API.
+        app : App
+            The :class:`~App` that owns this :class:`~Release`.
+        session : requests.Session
+            The requests Session this :class:`~Release` will use when
+            making requests.
+
+        """
+        assert release_json.get('AppId', app.id) == app.id
+        instance = cls(
+            app=app,
+            sequence=release_json['Sequence'],
+            version=release_json.get('Version'),
+            editable=release_json.get('Editable', True),
+            created_at=release_json.get('CreatedAt'),
+            edited_at=release_json.get('EditedAt'),
+            active_channel_ids=tuple(
+                c['Id'] for c in release_json.get('ActiveChannels') or ()),
+            config=release_json.get('Config'),
+        )
+        instance._session = _bound_session(session)
+        return instance
+
+    def __attrs_post_init__(self):
+        if self._active_channel_ids is None:
+            self._active_channel_ids = tuple(
+                channel.id for channel in self._active_channels or ())
+
+    @property
+    def active_channels(self):
+        """Which channels the release is currently available through.
+
+        Unless given when the release is created, the channels are
+        looked up in :attr:`App.channels_by_id` on first access.
+
+        """
+        if self._active_channels is None:
+            channels = self.app.channels_by_id
+            self._active_channels = [
+                channels[channel_id]
+                for channel_id in self._active_channel_ids or ()
+                if channel_id in channels
+            ]
+        return self._active_channels
+
+    @active_channels.setter
+    def active_channels(self, channels):
+        self._active_channels = channels
+        self._active_channel_ids = tuple(channel.id for channel in channels)
+
     @property
     def url(self):
         """The URL for the release.
@@ -409,9 +1039,24 @@ class Release(object):
     def config(self):
         """The release configuration YAML.
 
+        The configuration of a release that is no longer editable is
+        read from and stored in the
+        :class:`~replicated.cache.ConfigCache` of the client, if any.
+
         """
         if self._config is None:
-            self.refresh()
+            cache = getattr(self._session, 'config_cache', None)
+            if cache is None or self.editable or self.edited_at is None:
+                self.refresh()
+            else:
+                self._config = cache.get(
+                    self.app.id, self.sequence, self.edited_at)
+                if self._config is None:
+                    self.refresh()
+                    if not self.editable:
+                        cache.set(
+                            self.app.id, self.sequence, self.edited_at,
+                            self._config)
         return self._config
 
     @config.setter
@@ -421,19 +1066,40 @@ class Release(object):
         """
         if not isinstance(new_yaml, six.text_type):
             raise ValueError('Expected unicode text')
+        self._put_config(new_yaml)
+        self.refresh()
+
+    def _put_config(self, new_yaml):
+        """Upload a new configuration, without refreshing the release.
+
+        """
         self._config = None
+        self._config_digest = None
         url = self.url + '/raw'
-        yaml_data = ruamel.yaml.load(new_yaml)
-        version = yaml_data.get('version', '')
+        version = extract_version(new_yaml)
         response = self._session.put(
             url,
             data=new_yaml,
             headers={'Content-Type': 'application/yaml'},
         )
         if response.status_code != 200:
-            raise ReplicatedError(response.text)
+            raise ReplicatedError(response.text, response.status_code)
         self.version = version
-        self.refresh()
+
+    @property
+    def config_digest(self):
+        """A digest of the release configuration, ignoring its version
+        and release notes (see :func:`replicated.config.config_digest`).
+
+        The digest is kept until the release is edited.
+
+        """
+        cached = self._config_digest
+        if cached is None or cached[0] != self.edited_at:
+            config = self.config
+            cached = self._config_digest = (
+                self.edited_at, config_digest(config))
+        return cached[1]
 
     def refresh(self):
         """Refresh the mutable attributes of the release after a configuration
@@ -443,7 +1109,7 @@ class Release(object):
         url = self.url + '/properties'
         response = self._session.get(url)
         if response.status_code != 200:
-            raise ReplicatedError(response.text)
+            raise ReplicatedError(response.text, response.status_code)
         response_json = response.json()
         self._config = response_json['Config']
         self.created_at = response_json['CreatedAt']
@@ -456,7 +1122,7 @@ class Release(object):
         url = self.url + '/archive'
         response = self._session.post(url)
         if response.status_code != 204:
-            raise ReplicatedError(response.text)
+            raise ReplicatedError(response.text, response.status_code)
 
     def promote(self, channels, required=True, release_notes=None, label=None):
         """Promote the release to one or more channels.
@@ -479,24 +1145,14 @@ class Release(object):
 
         """
         url = self.url + '/promote'
-        if len(channels) == 0:
-            raise ValueError('Expected at least one channel')
-        data = {
-            'channels': [channel.id for channel in channels],
-            'required': required,
-        }
-        if release_notes is not None:
-            data['release_notes'] = release_notes
-        if label is not None:
-            data['label'] = label
-
+        data = _promote_data(channels, required, release_notes, label)
         response = self._session.post(
             url,
             data=json.dumps(data),
             headers={'Content-Type': 'application/json'},
         )
         if response.status_code != 204:
-            raise ReplicatedError(response.text)
+            raise ReplicatedError(response.text, response.status_code)
 
 
 class ReleasesSlice(object):
@@ -507,7 +1163,10 @@ class ReleasesSlice(object):
 
     """
 
-    def __init__(self, app, session):
+    #: The number of releases requested per page when iterating.
+    default_page_size = 100
+
+    def __init__(self, app, session, page_size=None, max_workers=None):
         """Create a :class:`~ReleasesSlice`.
 
         Parameters
@@ -516,10 +1175,25 @@ class ReleasesSlice(object):
             The application to query for releases.
         session : requests.Session
             The requests Session to use for querying the Replicated API.
+        page_size : int
+            The number of releases to request per page when iterating.
+            The default is :attr:`~ReleasesSlice.default_page_size`.
+        max_workers : int
+            If given, pages are fetched concurrently by up to this
+            many threads sharing ``session``.  The default is to fetch
+            pages one at a time.
 
         """
+        if page_size is None:
+            page_size = self.default_page_size
+        if page_size < 1:
+            raise ValueError('Expected a positive page size')
+        if max_workers is not None and max_workers < 1:
+            raise ValueError('Expected a positive number of workers')
         self.app = app
-        self._session = session
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self._session = _bound_session(session)
 
     def __getitem__(self, key):
         """Fetch a sequence of releases.
@@ -528,9 +1202,9 @@ class ReleasesSlice(object):
         ----------
         key : slice
             The sequence of releases to fetch.  This must be a
-            :class:`~slice` with ``step`` unset or ``1``.  If ``stop``
-            is ``None``, then whole set of :class:`~Release` is
-            fetched.
+            :class:`~slice` with ``step`` unset or ``1`` and no
+            negative bounds.  If ``stop`` is ``None``, then all
+            releases from ``start`` are fetched.
 
         """
         if not isinstance(key, slice):
@@ -538,34 +1212,229 @@ class ReleasesSlice(object):
 
         if key.step not in (None, 1):
             raise ValueError('Step size is not supported')
-        if key.stop is None:
-            suffix = '/releases'
+        if (key.start or 0) < 0 or (key.stop or 0) < 0:
+            raise ValueError('Negative indices are not supported')
+        if self.max_workers is not None:
+            return self._prefetch_slice(key)
+        start = key.start or 0
+        if key.stop is not None:
+            releases_json = self._fetch_page(start, key.stop - start)
+        elif start > 0:
+            releases_json = self.iter_json(start=start)
         else:
-            suffix = '/releases/paged?start={start}&count={stop}'.format(
-                start=key.start or 0, stop=key.stop)
+            url = self.app.url + '/releases'
+            releases_json = iter_json(self._session, url)
 
-        url = self.app.url + suffix
-        response = self._session.get(url)
-        if response.status_code != 200:
-            raise ReplicatedError(response.text)
-        releases_json = response.json()
+        return [
+            Release.from_json(item, self.app, self._session)
+            for item in releases_json
+        ]
 
-        if key.stop is not None:
-            releases_json = releases_json['releases']
+    def __iter__(self):
+        """Iterate over all releases, fetching them lazily one page at a
+        time.
+
+        """
+        return self.iterate()
+
+    def prefetch(self, max_workers=4, page_size=None):
+        """Return a copy of this slice that fetches pages concurrently.
+
+        Slicing the returned object splits the requested range into
+        windows of ``page_size`` releases that are fetched in parallel
+        and reassembled in order.  Iterating over it fetches
+        ``max_workers`` pages ahead of the consumer::
+
+            >>> releases = app.releases.prefetch(max_workers=8)[0:5000]
+
+        The worker threads share the connection pool of the session,
+        so ``max_workers`` should not exceed the ``pool_maxsize`` of
+        the :class:`~ReplicatedVendorAPI` (10 by default).
+
+        Parameters
+        ----------
+        max_workers : int
+            The maximum number of pages to fetch at once.
+        page_size : int
+            The number of releases to request per page.  The default
+            is :attr:`~ReleasesSlice.page_size`.
+
+        """
+        if page_size is None:
+            page_size = self.page_size
+        return type(self)(
+            self.app, self._session, page_size=page_size,
+            max_workers=max_workers)
+
+    def iterate(self, start=0, page_size=None):
+        """Lazily iterate over releases, newest first.
+
+        Releases are requested from the paged endpoint ``page_size``
+        at a time, and the next page is only requested once the
+        previous one has been consumed.  Abandoning the iterator stops
+        any further requests.
 
+        Parameters
+        ----------
+        start : int
+            The offset of the first release to yield.
+        page_size : int
+            The number of releases to request per page.  The default
+            is :attr:`~ReleasesSlice.page_size`.
+
+        """
+        for item in self.iter_json(start=start, page_size=page_size):
+            yield Release.from_json(item, self.app, self._session)
+
+    def iter_json(self, start=0, page_size=None):
+        """Lazily iterate over the release JSON returned by the
+        Replicated API, newest first.
+
+        This pages through releases like :meth:`~ReleasesSlice.iterate`
+        but yields the parsed JSON of each release instead of a
+        :class:`~Release`.
+
+        """
+        if page_size is None:
+            page_size = self.page_size
+        if page_size < 1:
+            raise ValueError('Expected a positive page size')
+        if self.max_workers is not None:
+            for item in self._prefetch_iter_json(start, page_size):
+                yield item
+            return
+        while True:
+            count = 0
+            for item in self._iter_page(start, page_size):
+                count += 1
+                yield item
+            if count < page_size:
+                return
+            start += count
+
+    def since(self, sequence, page_size=None):
+        """Lazily iterate over the releases newer than ``sequence``,
+        newest first.
+
+        Since release sequences increase monotonically, pages stop being
+        requested as soon as a release with a sequence of ``sequence``
+        or less is reached, so the cost of polling for new releases is
+        proportional to the number of new releases::
+
+            >>> new = list(app.releases.since(last_seen, page_size=10))
+
+        Parameters
+        ----------
+        sequence : int
+            The sequence of the newest release already known.
+        page_size : int
+            The number of releases to request per page.  The default
+            is :attr:`~ReleasesSlice.page_size`.
+
+        """
+        for release in self.iterate(page_size=page_size):
+            if release.sequence <= sequence:
+                return
+            yield release
+
+    def _prefetch_slice(self, key):
+        """Fetch the releases of ``key`` using concurrent page requests.
+
+        """
+        start = key.start or 0
+        if key.stop is None:
+            return [
+                Release.from_json(item, self.app, self._session)
+                for item in self._prefetch_iter_json(start, self.page_size)
+            ]
+        windows = [
+            (offset, min(self.page_size, key.stop - offset))
+            for offset in range(start, key.stop, self.page_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = list(executor.map(
+                lambda window: self._fetch_page(*window), windows))
         return [
             Release.from_json(item, self.app, self._session)
+            for releases_json in pages
             for item in releases_json
         ]
 
-    def __iter__(self):
-        """Fetch all releases and iterate over them.
+    def _prefetch_iter_json(self, start, page_size):
+        """Iterate over release JSON, fetching ``max_workers`` pages at
+        a time until the end of the release history is reached.
 
         """
-        return iter(self[:])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                futures = [
+                    executor.submit(
+                        self._fetch_page, start + index * page_size,
+                        page_size)
+                    for index in range(self.max_workers)
+                ]
+                for future in futures:
+                    releases_json = future.result()
+                    for item in releases_json:
+                        yield item
+                    if len(releases_json) < page_size:
+                        return
+                start += page_size * self.max_workers
+
+    def _fetch_page(self, start, count):
+        """Fetch the JSON of ``count`` releases from offset ``start``.
+
+        """
+        return list(self._iter_page(start, count))
+
+    def _iter_page(self, start, count):
+        """Iterate over the JSON of ``count`` releases from offset
+        ``start``.
+
+        """
+        if count <= 0:
+            return iter(())
+        url = self.app.url + '/releases/paged?start={start}&count={count}'
+        return iter_json(
+            self._session, url.format(start=start, count=count),
+            key='releases')
 
 
 @attributes
+class Promotion(object):
+    """One entry of a batch promotion plan.
+
+    See :meth:`replicated.core.ReplicatedVendorAPI.promote_releases`
+
+    """
+
+    #: The release to promote.
+    release = attr()
+
+    #: The channels to which to promote the release.
+    channels = attr()
+
+    #: The release notes, or ``None`` to use those of the release
+    #: configuration.
+    release_notes = attr(default=None, repr=False)
+
+    #: The release label, or ``None`` to use the version of the release
+    #: configuration.
+    label = attr(default=None)
+
+    #: ``True`` if the release will be a required upgrade.
+    required = attr(default=True, repr=False)
+
+    def run(self):
+        """Promote the release according to this entry.
+
+        """
+        self.release.promote(
+            self.channels, required=self.required,
+            release_notes=self.release_notes, label=self.label)
+
+
+@attributes(slots=True)
 class License(object):
     id = attr(repr=False)
     app = attr(repr=False)
@@ -589,6 +1458,9 @@ class License(object):
     is_instance_tracked = attr(repr=False)
     _session = attr(cmp=False, repr=False, hash=False, init=False)
 
+    #: INTERNAL: a caching optimization for the license key value.
+    _value = attr(default=None, cmp=False, repr=False, hash=False, init=False)
+
     class UpdatePolicy(enum.Enum):
         manual = 'manual'
         automatic = 'automatic'
@@ -623,19 +1495,171 @@ class License(object):
             untracked_instance_count=license_json['UntrackedInstanceCount'],
             is_instance_tracked=license_json['IsInstanceTracked'],
         )
-        instance._session = session
+        instance._session = _bound_session(session)
         return instance
 
     @property
     def value(self):
         """The license key value.
 
+        The value is fetched on first access and then kept.
+
         """
-        url = ReplicatedVendorAPI.base_url + '/licensekey/{}'.format(self.id)
-        response = self._session.get(url)
-        if response.status_code != 200:
-            raise ReplicatedError(response.text)
-        return response.content.decode()
+        if self._value is None:
+            url = ReplicatedVendorAPI.base_url + '/licensekey/{}'.format(
+                self.id)
+            response = self._session.get(url)
+            if response.status_code != 200:
+                raise ReplicatedError(response.text, response.status_code)
+            self._value = response.content.decode()
+        return self._value
+
+
+@attributes
+class PublishReport(object):
+    """The outcome of :meth:`App.publish`.
+
+    """
+
+    #: The :class:`~Channel` published on.
+    channel = attr()
+
+    #: The :class:`~Release` now on the channel.
+    release = attr(default=None)
+
+    #: The :class:`~Release` on the channel before publishing, if any.
+    previous = attr(default=None, repr=False)
+
+    #: Whether a new release was created and promoted.  ``False`` if
+    #: the channel already had the configuration.
+    created = attr(default=False)
+
+    #: Whether the channel was created.
+    created_channel = attr(default=False, repr=False)
+
+    #: Whether the previous release was archived.
+    archived = attr(default=False, repr=False)
+
+
+@attributes
+class LicenseBatchReport(object):
+    """The outcome of :meth:`App.create_licenses`.
+
+    """
+
+    #: The :class:`~License` objects created.
+    created = attr(default=Factory(list))
+
+    #: The ``(assignee, channel)`` pairs skipped because a license
+    #: already existed or the pair was repeated.
+    skipped = attr(default=Factory(list))
+
+    #: The ``(assignee, channel, error)`` triples of the licenses that
+    #: could not be created.
+    failed = attr(default=Factory(list))
+
+
+class LicenseIndex(object):
+    """An index of the :class:`~License` objects of an application.
+
+    Licenses can be looked up by ID, by assignee, by channel or by
+    assignee and channel together without scanning the full list.  The
+    index is safe to update from several threads.
+
+    See :attr:`replicated.core.App.license_index`
+
+    """
+
+    def __init__(self, licenses=()):
+        """Create a :class:`~LicenseIndex`.
+
+        Parameters
+        ----------
+        licenses : iterable
+            The :class:`~License` objects to index.
+
+        """
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._by_assignee = {}
+        self._by_channel = {}
+        self._by_assignee_channel = {}
+        for license in licenses:
+            self.add(license)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._by_id.values()))
+
+    def __contains__(self, license):
+        return self._by_id.get(license.id) is license
+
+    def add(self, license):
+        """Add a :class:`~License` to the index, replacing any license
+        with the same ID.
+
+        """
+        with self._lock:
+            previous = self._by_id.get(license.id)
+            if previous is not None:
+                self._discard(previous)
+            self._by_id[license.id] = license
+            self._by_assignee.setdefault(license.assignee, []).append(license)
+            self._by_channel.setdefault(license.channel.id, []).append(license)
+            key = (license.assignee, license.channel.id)
+            self._by_assignee_channel[key] = license
+
+    def _discard(self, license):
+        del self._by_id[license.id]
+        self._by_assignee[license.assignee].remove(license)
+        self._by_channel[license.channel.id].remove(license)
+        key = (license.assignee, license.channel.id)
+        if self._by_assignee_channel.get(key) is license:
+            del self._by_assignee_channel[key]
+
+    def get(self, license_id):
+        """Return the :class:`~License` with ID ``license_id``, or
+        ``None``.
+
+        """
+        return self._by_id.get(license_id)
+
+    def by_assignee(self, assignee):
+        """Return the licenses assigned to ``assignee``.
+
+        """
+        with self._lock:
+            return list(self._by_assignee.get(assignee, ()))
+
+    def by_channel(self, channel):
+        """Return the licenses of ``channel``.
+
+        Parameters
+        ----------
+        channel : Channel : str
+            The channel, or the ID of the channel.
+
+        """
+        channel_id = getattr(channel, 'id', channel)
+        with self._lock:
+            return list(self._by_channel.get(channel_id, ()))
+
+    def find(self, assignee, channel):
+        """Return the license of ``assignee`` on ``channel``, or ``None``.
+
+        Parameters
+        ----------
+        assignee : str
+            The license assignee.
+        channel : Channel : str
+            The channel, or the ID of the channel.
+
+        """
+        channel_id = getattr(channel, 'id', channel)
+        return self._by_assignee_channel.get((assignee, channel_id))
 
 
 class ReplicatedVendorAPI(object):
@@ -646,28 +1670,261 @@ class ReplicatedVendorAPI(object):
     #: The base URL of all Vendor API calls.
     base_url = 'https://api.replicated.com/vendor/v1'
 
-    def __init__(self, token):
+    def __init__(self, token, cache=None, validators=None, retry=None,
+                 rate_limiter=None, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, timeout=None, tcp_keepalive=None,
+                 stream_json=False, config_cache=None):
         """Create a :class:`~ReplicatedVendorAPI` instance.
 
         Parameters
         ----------
         token : str
             The Replicated API token used for authentication.
+        cache : ResponseCache
+            A :class:`~replicated.cache.ResponseCache` used to serve
+            repeated reads of the same resources.  The default is not
+            to cache responses.
+        validators : ValidatorCache
+            A :class:`~replicated.cache.ValidatorCache` used to make
+            conditional requests for resources read before, reusing
+            the previous response when the resource has not changed.
+            The default is not to make conditional requests.
+        retry : RetryPolicy
+            The :class:`~replicated.retry.RetryPolicy` used to retry
+            requests that fail with a transient error.  The default is
+            a :class:`~replicated.retry.RetryPolicy` with default
+            settings; pass ``RetryPolicy(total=0)`` to disable retries.
+        rate_limiter : TokenBucket
+            A :class:`~replicated.retry.TokenBucket` limiting the rate
+            of requests.  The same bucket may be shared by several
+            clients.  The default is not to limit the request rate.
+        pool_connections : int
+            The number of hosts for which connection pools are kept.
+        pool_maxsize : int
+            The maximum number of connections kept open to the API.
+            This should be at least the number of threads making
+            requests through the client at once.
+        pool_block : bool
+            If ``True``, a thread waits for a free connection when all
+            pooled connections are in use, instead of opening a
+            connection that is discarded after use.  The wait is not
+            bounded by ``timeout``, so a thread may block indefinitely
+            if connections are never released, as when streamed
+            responses are not closed.  The default is ``False``.
+        timeout : float : tuple
+            The timeout of requests, in seconds, either as a single
+            value or as a ``(connect, read)`` pair.  The default is to
+            wait indefinitely.
+        tcp_keepalive : int
+            If given, enable TCP keep-alive probes on idle connections
+            after this many seconds, so that connections dropped by
+            intermediate proxies are detected instead of hanging.
+        stream_json : bool
+            If ``True``, the license, release and application listings
+            are decoded incrementally while they are downloaded, which
+            lowers the peak memory of large listings and lets
+            :meth:`App.iter_licenses` and :meth:`ReleasesSlice.iterate`
+            yield their first objects early.  Listings served through
+            ``cache`` or ``validators`` are not streamed.  Decoding
+            uses ijson when it is installed (see
+            :mod:`replicated.streaming`).
+        config_cache : ConfigCache
+            A :class:`~replicated.cache.ConfigCache` keeping the
+            configurations of non-editable releases across processes.
+            The default is not to keep configurations.
+
+        The client may be shared by threads working on different
+        :class:`~App` objects: the connection pool, caches and rate
+        limiter are all safe for concurrent use.
 
         """
-        self.session = requests.Session()
+        if retry is None:
+            retry = RetryPolicy()
+        socket_options = None
+        if tcp_keepalive is not None:
+            socket_options = keepalive_socket_options(idle=tcp_keepalive)
+        self.session = VendorSession(
+            cache=cache, validators=validators, retry=retry,
+            rate_limiter=rate_limiter, timeout=timeout,
+            stream_json=stream_json, config_cache=config_cache)
+        self.session.configure_pool(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            pool_block=pool_block, socket_options=socket_options)
         self.session.headers['User-Agent'] = default_user_agent()
         self.session.headers['Authorization'] = token
+        #: The :class:`~replicated.metrics.RequestMetrics` of all
+        #: requests made by the client.
+        self.metrics = RequestMetrics()
+        self.session.request_callbacks.append(self.metrics)
+        self._app_index_lock = threading.Lock()
+        self._app_index = {}
+
+    def add_request_callback(self, callback):
+        """Call ``callback`` with a :class:`~replicated.metrics.RequestEvent`
+        after each request sent to the API.
+
+        Callbacks are called from the thread that made the request.
+
+        """
+        self.session.request_callbacks.append(callback)
+
+    def remove_request_callback(self, callback):
+        """Stop calling a callback added with
+        :meth:`~ReplicatedVendorAPI.add_request_callback`.
+
+        """
+        self.session.request_callbacks.remove(callback)
+
+    @contextlib.contextmanager
+    def measure(self):
+        """Count the requests made while a block of code runs.
+
+        This yields a :class:`~replicated.metrics.RequestTally` that is
+        updated with the requests made by all threads using the client
+        until the block exits::
+
+            >>> with api.measure() as tally:
+            ...     channel.create_license('customer')
+            >>> tally.count, tally.request_time, tally.by_endpoint
+
+        """
+        tally = RequestTally()
+        self.add_request_callback(tally)
+        try:
+            yield tally
+        finally:
+            self.remove_request_callback(tally)
+            tally.stop()
+
+    @property
+    def cache(self):
+        """The :class:`~replicated.cache.ResponseCache` of the client, or
+        ``None``.
+
+        """
+        return self.session.cache
+
+    def invalidate(self, target=None):
+        """Discard cached responses that may be stale.
+
+        Changes made through this client invalidate the affected
+        responses automatically; this is needed only to see changes
+        made by other clients before the cached responses expire.
+
+        Parameters
+        ----------
+        target : App : Channel : Release : License : str
+            An application, or an object belonging to the application,
+            whose cached responses should be discarded.  This
+            discards all cached responses for the application.  A URL
+            may be given instead.  The default is to invalidate the
+            whole cache.
+
+        """
+        if isinstance(target, (Channel, Release, License)):
+            target = target.app
+        if isinstance(target, App):
+            target = target.url + '/'
+        self.session.invalidate(target)
+
+    def promote_releases(self, plan, max_workers=4, retries=2):
+        """Promote many releases, each to one or more channels.
+
+        The promotions are made concurrently by up to ``max_workers``
+        threads sharing the connection pool of the client.  Transient
+        failures are retried; other failures are reported without
+        stopping the remaining promotions::
+
+            >>> results = api.promote_releases([
+            ...     (release, customer_channels, 'Notes', '1.2.0'),
+            ...     (other_release, [beta_channel]),
+            ... ])
+            >>> failed = [result for result in results if not result.ok]
+
+        Parameters
+        ----------
+        plan : iterable
+            The :class:`~Promotion` entries to execute.  Tuples of
+            ``(release, channels, release_notes, label)`` are also
+            accepted, with the last two elements optional.
+        max_workers : int
+            The maximum number of promotions in flight.
+        retries : int
+            The maximum number of retries of each promotion after a
+            transient failure.
+
+        Returns
+        -------
+        results : list
+            A :class:`~replicated.batch.BatchResult` for each entry of
+            ``plan``, in order, whose ``item`` is the
+            :class:`~Promotion`.
+
+        """
+        promotions = [
+            entry if isinstance(entry, Promotion) else Promotion(*entry)
+            for entry in plan
+        ]
+        return run_batch(
+            Promotion.run, promotions, max_workers=max_workers,
+            retries=retries, transient=_batch_transient(self.session))
 
     def get_apps(self):
         """Get a list of all :class:`replicated.core.App` instances.
 
         """
         url = self.base_url + '/apps'
-        response = self.session.get(url)
-        if response.status_code != 200:
-            raise ReplicatedError(response.text)
-        apps_json = response.json()
+        apps = []
+        index = {}
+        for item in iter_json(self.session, url):
+            app = App.from_json(item, session=self.session)
+            for field in ('id', 'name', 'slug'):
+                index[field, getattr(app, field)] = item['App']
+            apps.append(app)
+        with self._app_index_lock:
+            self._app_index = index
+        return apps
+
+    def get_app(self, id=None, name=None, slug=None):
+        """Get the :class:`replicated.core.App` with the given ID, name
+        or slug.
+
+        The first lookup fetches the list of applications, as
+        :meth:`~ReplicatedVendorAPI.get_apps` does, and remembers the
+        ID, name and slug of each application.  Later lookups of any
+        application of the account only fetch the channels of the
+        requested application.
 
-        return [App.from_json(item, session=self.session)
-                for item in apps_json]
+        Parameters
+        ----------
+        id : str
+            The ID of the application.
+        name : str
+            The name of the application.
+        slug : str
+            The slug of the application.
+
+        Raises
+        ------
+        ValueError
+            If no application matches.
+
+        """
+        field, value = _app_criterion(id, name, slug)
+        with self._app_index_lock:
+            app_json = self._app_index.get((field, value))
+        if app_json is not None:
+            url = self.base_url + '/app/{0}/channels'.format(app_json['Id'])
+            response = self.session.get(url)
+            if response.status_code == 200:
+                return App.from_json(
+                    {'App': app_json, 'Channels': response.json()},
+                    session=self.session)
+            if response.status_code != 404:
+                raise ReplicatedError(response.text, response.status_code)
+        # Unknown or deleted application: refresh the index.
+        for app in self.get_apps():
+            if getattr(app, field) == value:
+                return app
+        raise ValueError(
+            'No application with {0} {1!r}'.format(field, value))
@@ -1,2 +1,9 @@
 class ReplicatedError(Exception):
-    pass
+    """An error response from the Replicated Vendor API.
+
+    """
+
+    def __init__(self, message, status_code=None):
+        super(ReplicatedError, self).__init__(message)
+        #: The HTTP status code of the response, if known.
+        self.status_code = status_code
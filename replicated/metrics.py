@@ -0,0 +1,189 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Instrumentation of the requests made to the Vendor API.
+
+Every request sent by :class:`~replicated.session.VendorSession`,
+including each retry, is reported to its request callbacks as a
+:class:`~RequestEvent`.  Responses served from a
+:class:`~replicated.cache.ResponseCache` are not requests and are not
+reported.
+
+"""
+from bisect import bisect_left
+import threading
+
+from attr import attributes, attr
+
+from ._compat import monotonic as _monotonic
+
+
+@attributes
+class RequestEvent(object):
+    """A request sent to the Vendor API.
+
+    """
+
+    #: The HTTP method of the request.
+    method = attr()
+
+    #: The template of the requested endpoint (see
+    #: :func:`replicated.session.endpoint_template`).
+    endpoint = attr()
+
+    #: The requested URL.
+    url = attr(repr=False)
+
+    #: The status code of the response, or ``None`` if no response was
+    #: received.
+    status_code = attr()
+
+    #: The size of the response body in bytes.
+    bytes = attr(repr=False)
+
+    #: The time taken by the request, in seconds.
+    elapsed = attr()
+
+    #: The exception raised while making the request, if any.
+    error = attr(default=None, repr=False)
+
+
+class EndpointStats(object):
+    """Aggregated statistics of the requests made to one endpoint.
+
+    """
+
+    #: The upper bounds, in seconds, of the latency histogram buckets.
+    #: The last bucket counts the requests slower than all bounds.
+    buckets = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        #: The number of requests.
+        self.count = 0
+        #: The number of requests that failed without a response or
+        #: with an error status code.
+        self.errors = 0
+        #: The total size of the response bodies in bytes.
+        self.bytes = 0
+        #: The total time taken by the requests, in seconds.
+        self.elapsed = 0.0
+        #: The time taken by the slowest request, in seconds.
+        self.max_elapsed = 0.0
+        #: The number of requests in each latency bucket.
+        self.histogram = [0] * (len(self.buckets) + 1)
+
+    def __repr__(self):
+        return '{0}(count={1}, errors={2}, mean={3:.3f}s)'.format(
+            type(self).__name__, self.count, self.errors, self.mean)
+
+    @property
+    def mean(self):
+        """The mean time taken by a request, in seconds.
+
+        """
+        if self.count == 0:
+            return 0.0
+        return self.elapsed / self.count
+
+    def add(self, event):
+        """Add a :class:`~RequestEvent` to the statistics.
+
+        """
+        self.count += 1
+        if event.status_code is None or event.status_code >= 400:
+            self.errors += 1
+        self.bytes += event.bytes
+        self.elapsed += event.elapsed
+        self.max_elapsed = max(self.max_elapsed, event.elapsed)
+        self.histogram[bisect_left(self.buckets, event.elapsed)] += 1
+
+
+class RequestMetrics(object):
+    """Counters and latency histograms of requests, per endpoint.
+
+    A :class:`~RequestMetrics` is a request callback; the one used by
+    a :class:`~replicated.core.ReplicatedVendorAPI` is available as
+    :attr:`~replicated.core.ReplicatedVendorAPI.metrics`.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def __call__(self, event):
+        key = (event.method, event.endpoint)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats()
+            stats.add(event)
+
+    @property
+    def count(self):
+        """The total number of requests.
+
+        """
+        with self._lock:
+            return sum(stats.count for stats in self._stats.values())
+
+    def stats(self):
+        """Return a mapping of ``(method, endpoint)`` pairs to their
+        :class:`~EndpointStats`.
+
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self):
+        """Discard all statistics.
+
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+class RequestTally(object):
+    """The requests made while a
+    :meth:`~replicated.core.ReplicatedVendorAPI.measure` block runs.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = _monotonic()
+        self._stopped = None
+        #: The number of requests.
+        self.count = 0
+        #: The total time taken by the requests, in seconds.  Requests
+        #: made concurrently are counted separately.
+        self.request_time = 0.0
+        #: The number of requests made to each ``(method, endpoint)``.
+        self.by_endpoint = {}
+
+    def __repr__(self):
+        return '{0}(count={1}, request_time={2:.3f}s, wall_time={3:.3f}s)'\
+            .format(type(self).__name__, self.count, self.request_time,
+                    self.wall_time)
+
+    def __call__(self, event):
+        key = (event.method, event.endpoint)
+        with self._lock:
+            self.count += 1
+            self.request_time += event.elapsed
+            self.by_endpoint[key] = self.by_endpoint.get(key, 0) + 1
+
+    @property
+    def wall_time(self):
+        """The time elapsed since the block started, in seconds.
+
+        """
+        stopped = self._stopped
+        if stopped is None:
+            stopped = _monotonic()
+        return stopped - self._started
+
+    def stop(self):
+        """Stop the wall time clock.
+
+        """
+        self._stopped = _monotonic()
@@ -0,0 +1,230 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Retry and rate limiting policies for Vendor API requests.
+
+"""
+from email.utils import parsedate_tz, mktime_tz
+import random
+import threading
+import time
+
+import requests
+
+from ._compat import monotonic as _monotonic
+
+
+#: HTTP status codes of responses worth retrying.
+TRANSIENT_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+def backoff_delay(attempt, backoff=0.5, max_backoff=30.0):
+    """Return a jittered exponential backoff delay, in seconds.
+
+    Parameters
+    ----------
+    attempt : int
+        The number of attempts already made, starting at ``1``.
+    backoff : float
+        The base delay before the first retry.
+    max_backoff : float
+        The maximum delay before jitter.
+
+    """
+    delay = min(max_backoff, backoff * 2 ** (attempt - 1))
+    return random.uniform(0.5, 1.0) * delay
+
+
+def retry_after(response):
+    """Return the delay, in seconds, requested by the ``Retry-After``
+    header of ``response``, or ``None``.
+
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, mktime_tz(parsed) - time.time())
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    Requests using idempotent methods are retried after connection
+    errors, timeouts and responses with a transient status code.
+    Requests using other methods are only retried after a ``429 Too
+    Many Requests`` response, which means the request was not
+    processed.
+
+    """
+
+    #: The HTTP methods that are safe to repeat.
+    default_methods = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    def __init__(self, total=3, backoff=0.5, max_backoff=30.0,
+                 status_codes=TRANSIENT_STATUS_CODES, methods=None,
+                 respect_retry_after=True, max_retry_after=60.0):
+        """Create a :class:`~RetryPolicy`.
+
+        Parameters
+        ----------
+        total : int
+            The maximum number of retries of a request.
+        backoff : float
+            The base delay, in seconds, before the first retry.  The
+            delay doubles with each retry and is jittered.
+        max_backoff : float
+            The maximum backoff delay, in seconds, between two
+            attempts.  Delays requested by a ``Retry-After`` header
+            are not limited by it.
+        status_codes : set
+            The response status codes that may be retried.
+        methods : set
+            The HTTP methods that are retried after any transient
+            failure.  The default is
+            :attr:`~RetryPolicy.default_methods`.
+        respect_retry_after : bool
+            Wait for the delay requested by a ``Retry-After`` header,
+            if any, instead of the backoff delay.
+        max_retry_after : float
+            The longest delay, in seconds, requested by a
+            ``Retry-After`` header that is waited for.  A response
+            asking for a longer delay is not retried, so that it is
+            reported instead of stalling the client; retrying earlier
+            than requested would only be rejected again.  ``None``
+            waits for any delay.
+
+        """
+        self.total = total
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.status_codes = frozenset(status_codes)
+        if methods is None:
+            methods = self.default_methods
+        self.methods = frozenset(method.upper() for method in methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        """Return ``True`` if a request should be retried.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method of the request.
+        attempt : int
+            The number of attempts already made, starting at ``1``.
+        response : requests.Response
+            The response received, if any.
+        error : Exception
+            The exception raised while making the request, if any.
+
+        """
+        if attempt > self.total:
+            return False
+        if response is not None:
+            if self.respect_retry_after and self.max_retry_after is not None:
+                delay = retry_after(response)
+                if delay is not None and delay > self.max_retry_after:
+                    return False
+            if response.status_code == 429:
+                return 429 in self.status_codes
+            return (method.upper() in self.methods and
+                    response.status_code in self.status_codes)
+        return (method.upper() in self.methods and
+                isinstance(error, (requests.ConnectionError,
+                                   requests.Timeout)))
+
+    def delay(self, attempt, response=None):
+        """Return the delay, in seconds, before the next attempt.
+
+        """
+        if response is not None and self.respect_retry_after:
+            delay = retry_after(response)
+            if delay is not None:
+                return delay
+        return backoff_delay(attempt, self.backoff, self.max_backoff)
+
+
+class TokenBucket(object):
+    """A client-side rate limiter shared by all threads using it.
+
+    Each request takes a token from the bucket, which is refilled at
+    ``rate`` tokens per second up to ``capacity``.  When the bucket is
+    empty, :meth:`~TokenBucket.acquire` blocks until a token becomes
+    available, so bursts are smoothed to the sustainable rate instead
+    of being rejected by the API.
+
+    """
+
+    def __init__(self, rate, capacity=None, clock=_monotonic,
+                 sleep=time.sleep):
+        """Create a :class:`~TokenBucket`.
+
+        Parameters
+        ----------
+        rate : float
+            The number of tokens added per second.
+        capacity : float
+            The maximum number of tokens, which bounds the size of a
+            burst.  The default is ``rate``, allowing one second's
+            worth of requests at once.
+        clock : callable
+            A function returning the current time in seconds.
+        sleep : callable
+            A function that waits for a number of seconds.
+
+        """
+        if rate <= 0:
+            raise ValueError('Expected a positive rate')
+        if capacity is None:
+            capacity = max(1.0, float(rate))
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Take ``tokens`` from the bucket, waiting until they are
+        available.
+
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for ``seconds``.
+
+        This is used when the API reports that the rate limit has been
+        exceeded, so that all threads back off together.
+
+        """
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(self._updated, self._paused_until)
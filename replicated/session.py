@@ -0,0 +1,451 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import re
+import socket
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connection import HTTPConnection
+from six.moves.urllib.parse import urlsplit
+
+from ._compat import monotonic as _monotonic
+from .exceptions import ReplicatedError
+from .metrics import RequestEvent
+from .streaming import iter_json_items
+
+
+#: Patterns matching the path of each Vendor API endpoint, with the
+#: endpoint template they map to.
+_ENDPOINTS = [
+    (re.compile(pattern + '$'), template) for pattern, template in [
+        (r'/apps', '/apps'),
+        (r'/app/[^/]+/channels', '/app/{app_id}/channels'),
+        (r'/app/[^/]+/channel', '/app/{app_id}/channel'),
+        (r'/app/[^/]+/licenses', '/app/{app_id}/licenses'),
+        (r'/app/[^/]+/releases/paged', '/app/{app_id}/releases/paged'),
+        (r'/app/[^/]+/releases', '/app/{app_id}/releases'),
+        (r'/app/[^/]+/release', '/app/{app_id}/release'),
+        (r'/app/[^/]+/\d+/(properties|raw|archive|promote)',
+         '/app/{app_id}/{sequence}/\\1'),
+        (r'/licensekey/[^/]+', '/licensekey/{license_id}'),
+        (r'/license', '/license'),
+    ]
+]
+
+_APP_URL = re.compile(r'^(?P<base>.*)/app/[^/]+/')
+
+_SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+
+def endpoint_template(url):
+    """Return the template of the Vendor API endpoint requested by
+    ``url``.
+
+    Identifiers in the URL path are replaced by placeholders, so that
+    for example the URLs of all release properties map to
+    ``'/app/{app_id}/{sequence}/properties'``.  The path of URLs that
+    do not belong to a known endpoint is returned unchanged.
+
+    """
+    path = urlsplit(url).path
+    for pattern, template in _ENDPOINTS:
+        match = pattern.search(path)
+        if match is not None:
+            return match.expand(template)
+    return path
+
+
+def keepalive_socket_options(idle=60, interval=10, count=6):
+    """Return socket options enabling TCP keep-alive probes.
+
+    Options that the platform does not support are left out.
+
+    Parameters
+    ----------
+    idle : int
+        The number of seconds a connection is idle before the first
+        probe is sent.
+    interval : int
+        The number of seconds between probes.
+    count : int
+        The number of failed probes after which the connection is
+        dropped.
+
+    """
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in [('TCP_KEEPIDLE', idle),
+                        ('TCP_KEEPINTVL', interval),
+                        ('TCP_KEEPCNT', count)]:
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class VendorAdapter(HTTPAdapter):
+    """A :class:`requests.adapters.HTTPAdapter` whose connections are
+    created with custom socket options.
+
+    """
+
+    def __init__(self, socket_options=None, **kwargs):
+        """Create a :class:`~VendorAdapter`.
+
+        Parameters
+        ----------
+        socket_options : list
+            The ``(level, option, value)`` socket options of new
+            connections.  The default is the options of
+            :mod:`urllib3`.
+        **kwargs
+            The arguments of :class:`requests.adapters.HTTPAdapter`.
+
+        """
+        self.socket_options = socket_options
+        super(VendorAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super(VendorAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+class CachedResponse(requests.Response):
+    """A :class:`requests.Response` with a fully read body whose decoded
+    JSON is memoized, so it can be served repeatedly from a cache.
+
+    """
+
+    def __init__(self):
+        super(CachedResponse, self).__init__()
+        self._json = None
+
+    @classmethod
+    def from_response(cls, response):
+        """Create a :class:`~CachedResponse` from a
+        :class:`requests.Response`, reading its body.
+
+        """
+        instance = cls()
+        instance.__setstate__(response.__getstate__())
+        return instance
+
+    def json(self, **kwargs):
+        if self._json is None:
+            self._json = super(CachedResponse, self).json(**kwargs)
+        return self._json
+
+
+class VendorSession(requests.Session):
+    """The :class:`requests.Session` used by
+    :class:`~replicated.core.ReplicatedVendorAPI`.
+
+    All requests made by the API client and the objects it creates go
+    through :meth:`~VendorSession.request`.  ``GET`` requests are
+    served from :attr:`~VendorSession.cache` when one is configured,
+    and revalidated with conditional requests when
+    :attr:`~VendorSession.validators` is configured.  Any other request
+    invalidates the cached responses it may affect.  Requests sent to
+    the API are throttled by :attr:`~VendorSession.rate_limiter` and
+    retried according to :attr:`~VendorSession.retry`.
+
+    """
+
+    def __init__(self, cache=None, validators=None, retry=None,
+                 rate_limiter=None, timeout=None, stream_json=False,
+                 config_cache=None):
+        """Create a :class:`~VendorSession`.
+
+        Parameters
+        ----------
+        cache : ResponseCache
+            The cache of ``GET`` responses.  The default is not to
+            cache responses.
+        validators : ValidatorCache
+            The cache of responses to revalidate with conditional
+            requests.  The default is not to make conditional requests.
+        retry : RetryPolicy
+            The policy used to retry failed requests.  The default is
+            not to retry.
+        rate_limiter : TokenBucket
+            The rate limiter from which each request takes a token.
+            The default is not to limit the request rate.
+        timeout : float : tuple
+            The default timeout of requests, in seconds, either as a
+            single value or as a ``(connect, read)`` pair.  The default
+            is to wait indefinitely.
+        stream_json : bool
+            If ``True``, large list responses are decoded
+            incrementally while they are read (see
+            :func:`~iter_json`).
+        config_cache : ConfigCache
+            The persistent cache of release configurations.  The
+            default is not to cache configurations.
+
+        """
+        super(VendorSession, self).__init__()
+        #: The :class:`~replicated.cache.ResponseCache`, if any.
+        self.cache = cache
+        #: The :class:`~replicated.cache.ValidatorCache`, if any.
+        self.validators = validators
+        #: The :class:`~replicated.retry.RetryPolicy`, if any.
+        self.retry = retry
+        #: The :class:`~replicated.retry.TokenBucket`, if any.
+        self.rate_limiter = rate_limiter
+        #: The default timeout of requests.
+        self.timeout = timeout
+        #: The callables called with a
+        #: :class:`~replicated.metrics.RequestEvent` after each request
+        #: sent to the API.
+        self.request_callbacks = []
+        #: Whether :func:`~iter_json` decodes responses
+        #: incrementally.
+        self.stream_json = stream_json
+        #: The :class:`~replicated.cache.ConfigCache`, if any.
+        self.config_cache = config_cache
+
+    def configure_pool(self, pool_connections=10, pool_maxsize=10,
+                       pool_block=False, socket_options=None):
+        """Replace the connection pools of the session.
+
+        Parameters
+        ----------
+        pool_connections : int
+            The number of hosts for which connection pools are kept.
+        pool_maxsize : int
+            The maximum number of connections kept per host.  This
+            should be at least the number of threads sharing the
+            session.
+        pool_block : bool
+            If ``True``, a thread waits, without a time limit, for a
+            free connection when all connections to a host are in use,
+            instead of opening an extra connection that is discarded
+            after use.
+        socket_options : list
+            The socket options of new connections, such as those
+            returned by :func:`~keepalive_socket_options`.
+
+        """
+        for prefix in ('https://', 'http://'):
+            self.mount(prefix, VendorAdapter(
+                socket_options=socket_options,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block))
+
+    def request(self, method, url, *args, **kwargs):
+        method = method.upper()
+        if method not in _SAFE_METHODS:
+            try:
+                return self._send(method, url, *args, **kwargs)
+            finally:
+                self.invalidate(url)
+        cacheable = (
+            (self.cache is not None or self.validators is not None)
+            and method == 'GET' and not args and not kwargs.get('params')
+            and not kwargs.get('stream'))
+        if not cacheable:
+            return self._send(method, url, *args, **kwargs)
+        return self._cached_get(url, **kwargs)
+
+    def _cached_get(self, url, **kwargs):
+        """Make a ``GET`` request through the configured caches.
+
+        """
+        cache = self.cache
+        validators = self.validators
+        if cache is not None:
+            response = cache.get(url)
+            if response is not None:
+                return response
+        previous = None
+        if validators is not None:
+            previous = validators.get(url)
+            if previous is not None:
+                kwargs['headers'] = validators.conditional_headers(
+                    previous, kwargs.get('headers'))
+        response = self._send('GET', url, **kwargs)
+        if response.status_code == 304 and previous is not None:
+            response = previous
+        elif response.status_code == 200:
+            response = CachedResponse.from_response(response)
+            if validators is not None:
+                validators.set(url, response)
+        else:
+            return response
+        if cache is not None:
+            cache.set(url, endpoint_template(url), response)
+        return response
+
+    def _send(self, method, url, *args, **kwargs):
+        """Send a request to the API, applying the rate limiter and retry
+        policy.
+
+        """
+        retry = self.retry
+        rate_limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            attempt += 1
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            if self.timeout is not None:
+                kwargs.setdefault('timeout', self.timeout)
+            started = _monotonic()
+            try:
+                response = super(VendorSession, self).request(
+                    method, url, *args, **kwargs)
+            except Exception as error:
+                self._notify(method, url, None, error, started, kwargs)
+                if not isinstance(
+                        error, (requests.ConnectionError, requests.Timeout)):
+                    raise
+                if retry is None or not retry.should_retry(
+                        method, attempt, error=error):
+                    raise
+                delay = retry.delay(attempt)
+            else:
+                self._notify(method, url, response, None, started, kwargs)
+                if retry is None or not retry.should_retry(
+                        method, attempt, response=response):
+                    return response
+                delay = retry.delay(attempt, response)
+                if response.status_code == 429 and rate_limiter is not None:
+                    rate_limiter.pause(delay)
+                response.close()
+            time.sleep(delay)
+
+    def _notify(self, method, url, response, error, started, kwargs):
+        """Report a request to the request callbacks.
+
+        """
+        callbacks = self.request_callbacks
+        if not callbacks:
+            return
+        elapsed = _monotonic() - started
+        status_code = size = None
+        if response is not None:
+            status_code = response.status_code
+            if kwargs.get('stream'):
+                size = int(response.headers.get('Content-Length') or 0)
+            else:
+                size = len(response.content or b'')
+        event = RequestEvent(
+            method=method, endpoint=endpoint_template(url), url=url,
+            status_code=status_code, bytes=size or 0, elapsed=elapsed,
+            error=error)
+        for callback in list(callbacks):
+            callback(event)
+
+    def invalidate(self, url=None):
+        """Discard the cached responses that a change to ``url`` may have
+        made stale.
+
+        A change to an application invalidates the application's
+        responses and the list of applications; any other change
+        invalidates the whole cache.  Responses kept for conditional
+        requests are not affected, since they are always revalidated.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the modified resource.  The default is to
+            invalidate the whole cache.
+
+        """
+        cache = self.cache
+        if cache is None:
+            return
+        match = None if url is None else _APP_URL.match(url)
+        if match is None:
+            cache.invalidate()
+        else:
+            cache.invalidate(match.group(0))
+            cache.invalidate(match.group('base') + '/apps')
+
+
+class _UnboundSession(object):
+    """The session of objects that are not bound to a blocking
+    session, such as those returned by
+    :class:`~replicated.aio.AsyncReplicatedVendorAPI` or loaded from a
+    :class:`~replicated.snapshot.Snapshot` without a session.
+
+    Any request raises a :class:`RuntimeError` explaining why.
+
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        raise RuntimeError(
+            'Cannot request {0} {1}: the object is not bound to a session. '
+            'Use the coroutines of AsyncReplicatedVendorAPI for objects it '
+            'returned, or pass a session when loading objects from a '
+            'Snapshot.'.format(method, url))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+_UNBOUND_SESSION = _UnboundSession()
+
+
+def _bound_session(session):
+    """Return ``session``, or a session raising an explanatory error on
+    any request if it is ``None``.
+
+    """
+    return _UNBOUND_SESSION if session is None else session
+
+
+def iter_json(session, url, key=None):
+    """Fetch a JSON list from ``url`` and iterate over its elements.
+
+    When ``session`` is a :class:`~VendorSession` with
+    :attr:`~VendorSession.stream_json` set and no response cache, the
+    response body is streamed and each element is decoded as soon as it
+    has been read (see :func:`replicated.streaming.iter_json_items`).
+    Otherwise the whole response is decoded first.
+
+    Parameters
+    ----------
+    session : requests.Session
+        The session used to make the request.
+    url : str
+        The URL to fetch.
+    key : str
+        If given, the response is an object and the elements of its
+        list member ``key`` are yielded.
+
+    Raises
+    ------
+    ReplicatedError
+        If the API responds with an error status code.
+
+    """
+    stream = (
+        isinstance(session, VendorSession) and session.stream_json
+        and session.cache is None and session.validators is None)
+    response = session.get(url, stream=stream)
+    if response.status_code != 200:
+        raise ReplicatedError(response.text, response.status_code)
+    if not stream:
+        response_json = response.json()
+        items = response_json if key is None else response_json[key]
+        for item in items:
+            yield item
+        return
+    response.raw.decode_content = True
+    try:
+        for item in iter_json_items(response.raw, key=key):
+            yield item
+    finally:
+        response.close()
@@ -0,0 +1,448 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""A local snapshot of the Vendor API state of applications.
+
+A :class:`~Snapshot` stores the channels, releases, release
+configurations and licenses of applications in a SQLite database.
+Reports can then be run against the snapshot without making any
+request::
+
+    >>> snapshot = Snapshot('vendor.db')
+    >>> snapshot.pull(api.get_app(name='My App'))
+
+    >>> app = snapshot.app(name='My App')
+    >>> releases = snapshot.releases(app, channel=app.channels[0])
+    >>> licenses = snapshot.licenses(app, archived=False)
+
+Objects loaded from a snapshot are the usual :class:`~App`,
+:class:`~Channel`, :class:`~Release` and :class:`~License` objects.  They
+make requests only if given a session, such as the ``session`` of a
+:class:`~replicated.core.ReplicatedVendorAPI`.
+
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from .batch import run_batch
+from .core import App, License, Release, _app_criterion
+from .session import iter_json
+from .sync import _sync_floor
+
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS apps (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        slug TEXT NOT NULL,
+        pulled_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS channels (
+        app_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        json TEXT NOT NULL,
+        PRIMARY KEY (app_id, id)
+    );
+    CREATE TABLE IF NOT EXISTS releases (
+        app_id TEXT NOT NULL,
+        sequence INTEGER NOT NULL,
+        editable INTEGER NOT NULL,
+        edited_at TEXT,
+        json TEXT NOT NULL,
+        config TEXT,
+        PRIMARY KEY (app_id, sequence)
+    );
+    CREATE TABLE IF NOT EXISTS release_channels (
+        app_id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        sequence INTEGER NOT NULL,
+        PRIMARY KEY (app_id, channel_id, sequence)
+    );
+    CREATE TABLE IF NOT EXISTS licenses (
+        app_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        assignee TEXT NOT NULL,
+        archived INTEGER NOT NULL,
+        json TEXT NOT NULL,
+        PRIMARY KEY (app_id, id)
+    );
+    CREATE INDEX IF NOT EXISTS licenses_channel
+        ON licenses (app_id, channel_id);
+    CREATE INDEX IF NOT EXISTS licenses_assignee
+        ON licenses (app_id, assignee);
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+class Snapshot(object):
+    """A SQLite store of the channels, releases and licenses of
+    applications.
+
+    """
+
+    def __init__(self, path=':memory:'):
+        """Open or create a :class:`~Snapshot`.
+
+        Parameters
+        ----------
+        path : str
+            The path of the SQLite database.  The default is to keep
+            the snapshot in memory.
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database.
+
+        """
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Pulling ################################################################
+
+    def pull(self, app, configs=True, max_workers=4):
+        """Store the full state of ``app``, replacing any previous
+        snapshot of it.
+
+        Parameters
+        ----------
+        app : App
+            The application to store, with a session able to make
+            requests.
+        configs : bool
+            If ``True`` (default), the configuration of every release
+            is stored too.  This makes one request per release not
+            already in the :class:`~replicated.cache.ConfigCache` of the
+            client, if any.
+        max_workers : int
+            The maximum number of configurations fetched at once.
+
+        Returns
+        -------
+        releases : list
+            The stored :class:`~Release` objects, newest first.
+
+        """
+        return self._update(app, True, configs, max_workers, None)
+
+    def refresh(self, app, configs=True, max_workers=4, page_size=20):
+        """Update the snapshot of ``app`` with the changes since the
+        previous pull or refresh.
+
+        Channels and licenses are fetched again.  Releases are only
+        fetched back to the oldest stored release that may have
+        changed: releases created since the newest stored release and
+        releases that were still editable.  Releases archived in that
+        range are removed; use :meth:`~Snapshot.pull` to also remove
+        older archived releases.
+
+        Parameters
+        ----------
+        app : App
+            The application to update, with a session able to make
+            requests.
+        configs : bool
+            If ``True`` (default), the configurations of new and
+            changed releases are stored too.
+        max_workers : int
+            The maximum number of configurations fetched at once.
+        page_size : int
+            The number of releases requested per page.
+
+        Returns
+        -------
+        releases : list
+            The new and changed :class:`~Release` objects, newest
+            first.
+
+        """
+        return self._update(app, False, configs, max_workers, page_size)
+
+    def _update(self, app, full, configs, max_workers, page_size):
+        session = app._session
+        channels_json = list(iter_json(session, app.url + '/channels'))
+
+        with self._lock:
+            connection = self._connection
+            newest = connection.execute(
+                'SELECT MAX(sequence) FROM releases WHERE app_id = ?',
+                (app.id,)).fetchone()[0]
+            editable = dict(connection.execute(
+                'SELECT sequence, edited_at FROM releases '
+                'WHERE app_id = ? AND editable', (app.id,)).fetchall())
+        if full or newest is None:
+            newest = None
+            floor = 0
+            releases_json = app.releases.iter_json()
+        else:
+            floor = _sync_floor(newest, editable)
+            releases_json = app.releases.iter_json(page_size=page_size)
+
+        changed = []
+        seen = set()
+        for item in releases_json:
+            sequence = item['Sequence']
+            if sequence <= floor:
+                break
+            seen.add(sequence)
+            unchanged = newest is not None and sequence <= newest and (
+                sequence not in editable or (
+                    item['Editable'] and
+                    item['EditedAt'] == editable[sequence]))
+            if unchanged:
+                continue
+            changed.append(item)
+
+        releases = [
+            Release.from_json(item, app, session) for item in changed]
+        if configs:
+            for release, item in zip(releases, changed):
+                if item.get('Config') is not None:
+                    release._config = item['Config']
+            results = run_batch(
+                lambda release: release.config, releases,
+                max_workers=max_workers)
+            for result in results:
+                if not result.ok:
+                    raise result.error
+        licenses_json = list(iter_json(session, app.url + '/licenses'))
+
+        with self._lock, self._connection as connection:
+            self._store_app(connection, app, channels_json)
+            # Releases no longer listed have been archived.
+            stale = [
+                (app.id, sequence) for (sequence,) in connection.execute(
+                    'SELECT sequence FROM releases '
+                    'WHERE app_id = ? AND sequence > ?', (app.id, floor))
+                if sequence not in seen
+            ]
+            connection.executemany(
+                'DELETE FROM releases WHERE app_id = ? AND sequence = ?',
+                stale)
+            self._store_releases(connection, app, releases, changed)
+            self._store_release_channels(connection, app, channels_json)
+            self._store_licenses(connection, app, licenses_json)
+        return releases
+
+    def _store_app(self, connection, app, channels_json):
+        connection.execute(
+            'INSERT OR REPLACE INTO apps VALUES (?, ?, ?, ?)',
+            (app.id, app.name, app.slug, time.time()))
+        connection.execute('DELETE FROM channels WHERE app_id = ?', (app.id,))
+        connection.executemany(
+            'INSERT INTO channels VALUES (?, ?, ?, ?)',
+            [(app.id, item['Id'], item['Position'], _dumps(item))
+             for item in channels_json])
+
+    def _store_releases(self, connection, app, releases, releases_json):
+        rows = []
+        for release, item in zip(releases, releases_json):
+            item = dict(item)
+            item.pop('Config', None)
+            rows.append((
+                app.id, release.sequence, bool(release.editable),
+                release.edited_at, _dumps(item), release._config))
+        connection.executemany(
+            'INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def _store_release_channels(self, connection, app, channels_json):
+        # Any release, however old, may have been promoted since the
+        # previous update, so the active releases are taken from the
+        # channels rather than from the listed releases.
+        connection.execute(
+            'DELETE FROM release_channels WHERE app_id = ?', (app.id,))
+        connection.executemany(
+            'INSERT INTO release_channels VALUES (?, ?, ?)',
+            [(app.id, item['Id'], item['ReleaseSequence'])
+             for item in channels_json if item.get('ReleaseSequence')])
+
+    def _store_licenses(self, connection, app, licenses_json):
+        connection.execute('DELETE FROM licenses WHERE app_id = ?', (app.id,))
+        connection.executemany(
+            'INSERT INTO licenses VALUES (?, ?, ?, ?, ?, ?)',
+            [(app.id, item['Id'], item['ChannelId'], item['Assignee'],
+              bool(item['Archived']), _dumps(item))
+             for item in licenses_json])
+
+    # Queries ################################################################
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def apps(self, session=None):
+        """Return the :class:`~App` objects of the snapshot.
+
+        Parameters
+        ----------
+        session : requests.Session
+            The session given to the loaded objects.  The default is
+            to load objects that cannot make requests.
+
+        """
+        return [
+            self._load_app(row, session) for row in self._query(
+                'SELECT id, name, slug FROM apps ORDER BY name')]
+
+    def app(self, id=None, name=None, slug=None, session=None):
+        """Return the :class:`~App` with the given ID, name or slug.
+
+        Raises
+        ------
+        ValueError
+            If the application is not in the snapshot.
+
+        """
+        field, value = _app_criterion(id, name, slug)
+        rows = self._query(
+            'SELECT id, name, slug FROM apps WHERE {0} = ?'.format(field),
+            (value,))
+        if not rows:
+            raise ValueError(
+                'No application with {0} {1!r} in snapshot'.format(
+                    field, value))
+        return self._load_app(rows[0], session)
+
+    def _load_app(self, row, session):
+        id, name, slug = row
+        channels_json = [
+            json.loads(item) for (item,) in self._query(
+                'SELECT json FROM channels WHERE app_id = ? '
+                'ORDER BY position', (id,))]
+        return App.from_json(
+            {'App': {'Id': id, 'Name': name, 'Slug': slug},
+             'Channels': channels_json},
+            session=session)
+
+    def releases(self, app, channel=None, since=None, editable=None,
+                 limit=None):
+        """Return releases of ``app``, newest first, with their stored
+        configuration.
+
+        Parameters
+        ----------
+        app : App
+            The application, usually loaded with :meth:`~Snapshot.app`.
+        channel : Channel
+            If given, only the releases active on this channel.
+        since : int
+            If given, only the releases with a greater sequence.
+        editable : bool
+            If given, only the releases that are, or are not, editable.
+        limit : int
+            If given, the maximum number of releases to return.
+
+        """
+        sql = 'SELECT r.json, r.config FROM releases AS r'
+        conditions = ['r.app_id = ?']
+        parameters = [app.id]
+        if channel is not None:
+            sql += (' JOIN release_channels AS c ON c.app_id = r.app_id'
+                    ' AND c.sequence = r.sequence')
+            conditions.append('c.channel_id = ?')
+            parameters.append(channel.id)
+        if since is not None:
+            conditions.append('r.sequence > ?')
+            parameters.append(since)
+        if editable is not None:
+            conditions.append('r.editable = ?')
+            parameters.append(bool(editable))
+        sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY r.sequence DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            parameters.append(limit)
+        active = self._active_channel_ids(app)
+        return [
+            self._load_release(app, item, config, active)
+            for item, config in self._query(sql, parameters)]
+
+    def release(self, app, sequence):
+        """Return the release ``sequence`` of ``app``.
+
+        Raises
+        ------
+        KeyError
+            If the release is not in the snapshot.
+
+        """
+        rows = self._query(
+            'SELECT json, config FROM releases '
+            'WHERE app_id = ? AND sequence = ?', (app.id, sequence))
+        if not rows:
+            raise KeyError(sequence)
+        item, config = rows[0]
+        return self._load_release(
+            app, item, config, self._active_channel_ids(app))
+
+    def _active_channel_ids(self, app):
+        active = {}
+        for sequence, channel_id in self._query(
+                'SELECT sequence, channel_id FROM release_channels '
+                'WHERE app_id = ?', (app.id,)):
+            active.setdefault(sequence, []).append(channel_id)
+        return active
+
+    def _load_release(self, app, item, config, active):
+        release_json = json.loads(item)
+        # The stored release JSON is not updated when an older release
+        # is promoted.
+        release_json['ActiveChannels'] = [
+            {'Id': channel_id}
+            for channel_id in active.get(release_json['Sequence'], ())]
+        release = Release.from_json(release_json, app, app._session)
+        release._config = config
+        return release
+
+    def licenses(self, app, channel=None, assignee=None, archived=None):
+        """Return the licenses of ``app``.
+
+        Parameters
+        ----------
+        app : App
+            The application, usually loaded with :meth:`~Snapshot.app`.
+        channel : Channel
+            If given, only the licenses of this channel.
+        assignee : str
+            If given, only the licenses of this assignee.
+        archived : bool
+            If given, only the licenses that are, or are not, archived.
+
+        """
+        conditions = ['app_id = ?']
+        parameters = [app.id]
+        for column, value in (('channel_id', channel and channel.id),
+                              ('assignee', assignee),
+                              ('archived', archived)):
+            if value is not None:
+                conditions.append('{0} = ?'.format(column))
+                parameters.append(value)
+        rows = self._query(
+            'SELECT json FROM licenses WHERE ' + ' AND '.join(conditions),
+            parameters)
+        channels = app.channels_by_id
+        licenses = []
+        for (item,) in rows:
+            license_json = json.loads(item)
+            licenses.append(License.from_json(
+                license_json, app=app,
+                channel=channels[license_json['ChannelId']],
+                session=app._session))
+        return licenses
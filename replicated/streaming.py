@@ -0,0 +1,173 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Incremental decoding of large JSON list responses.
+
+:func:`~iter_json_items` decodes the elements of a JSON array one at
+a time while the response body is read, so that a listing of tens of
+thousands of licenses never exists in memory as a whole, either as
+text or as decoded objects.
+
+When `ijson <https://pypi.org/project/ijson/>`_ is installed, its
+fastest available backend (the C extension when compiled) is used;
+ijson can be installed with the ``streaming`` extra::
+
+    pip install python-replicated[streaming]
+
+Otherwise a pure Python decoder built on :mod:`json` is used.
+
+"""
+import codecs
+import json
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+
+#: The number of bytes read from the stream at a time.
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+_NUMBER_CHARS = '0123456789+-.eE'
+
+
+def iter_json_items(stream, key=None, chunk_size=CHUNK_SIZE):
+    """Iterate over the elements of a JSON array read from ``stream``.
+
+    Parameters
+    ----------
+    stream : file-like
+        A binary file-like object with a ``read`` method, such as the
+        ``raw`` attribute of a streamed :class:`requests.Response`.
+    key : str
+        If given, the document is an object and the elements of its
+        array member ``key`` are yielded, such as ``'releases'`` for
+        the paged release listing.  The default is to yield the
+        elements of a top-level array.
+    chunk_size : int
+        The number of bytes read from ``stream`` at a time.
+
+    """
+    if ijson is not None:
+        prefix = 'item' if key is None else key + '.item'
+        return ijson.items(stream, prefix, use_float=True)
+    return _JSONArrayReader(stream, chunk_size).items(key)
+
+
+class _JSONArrayReader(object):
+    """A pure Python incremental decoder of a JSON array.
+
+    Each element is decoded with :meth:`json.JSONDecoder.raw_decode`
+    from a buffer holding little more than the element itself.
+
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = u''
+        self._position = 0
+        self._eof = False
+
+    def items(self, key=None):
+        if key is not None:
+            self._find_member(key)
+        self._expect(u'[')
+        if self._peek() == u']':
+            self._position += 1
+            return
+        while True:
+            yield self._decode()
+            separator = self._peek()
+            self._position += 1
+            if separator == u']':
+                return
+            if separator != u',':
+                self._error('Expected "," or "]"')
+
+    def _find_member(self, key):
+        """Advance to the value of member ``key`` of the top-level
+        object, skipping the other members.
+
+        """
+        self._expect(u'{')
+        while True:
+            if self._peek() != u'"':
+                raise KeyError(key)
+            name = self._decode()
+            self._expect(u':')
+            if name == key:
+                return
+            self._decode()
+            separator = self._peek()
+            self._position += 1
+            if separator != u',':
+                raise KeyError(key)
+
+    def _fill(self):
+        """Read the next chunk of the stream into the buffer.
+
+        Returns ``False`` at the end of the stream.
+
+        """
+        if self._eof:
+            return False
+        data = self._stream.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            self._buffer += self._text.decode(b'', final=True)
+            return False
+        if self._position > 0:
+            self._buffer = self._buffer[self._position:]
+            self._position = 0
+        self._buffer += self._text.decode(data)
+        return True
+
+    def _peek(self):
+        """Return the next non-whitespace character, without consuming
+        it.
+
+        """
+        while True:
+            buffer = self._buffer
+            position = self._position
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            self._position = position
+            if position < len(buffer):
+                return buffer[position]
+            if not self._fill():
+                self._error('Unexpected end of document')
+
+    def _expect(self, char):
+        if self._peek() != char:
+            self._error('Expected {0!r}'.format(char))
+        self._position += 1
+
+    def _decode(self):
+        """Decode the JSON value at the current position.
+
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._position)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # A number may continue in the next chunk.
+            buffer = self._buffer
+            if (end < len(buffer) and buffer[end] not in _NUMBER_CHARS
+                    or not self._fill()):
+                self._position = end
+                return value
+
+    def _error(self, message):
+        raise ValueError('{0} at offset {1} of the buffered document'.format(
+            message, self._position))
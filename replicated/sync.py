@@ -0,0 +1,131 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""Incremental synchronization of the releases of an application.
+
+"""
+import json
+import os
+
+
+def _sync_floor(newest, editable):
+    """Return the sequence below which no release can have changed
+    since the newest release ``newest`` was seen, given the sequences
+    of the releases that were still ``editable``.
+
+    """
+    return min([newest] + [sequence - 1 for sequence in editable])
+
+
+class ReleaseSync(object):
+    """Detect the releases of an application created or edited since
+    the previous synchronization.
+
+    The sequence of the newest release seen (the high-water mark) and
+    the edit times of the releases that are still editable are kept,
+    and optionally saved to a JSON file, so that each
+    :meth:`~ReleaseSync.sync` only requests the releases newer than the
+    oldest release that may have changed::
+
+        >>> sync = ReleaseSync(app, path='release-sync.json')
+        >>> for release in sync.sync():
+        ...     print(release.sequence)
+
+    The first synchronization of an application lists all of its
+    releases.  Several applications may share the same state file, but
+    it must not be written by several processes at once.
+
+    """
+
+    def __init__(self, app, path=None, page_size=20):
+        """Create a :class:`~ReleaseSync`.
+
+        Parameters
+        ----------
+        app : App
+            The application whose releases are synchronized.
+        path : str
+            The JSON file in which the synchronization state is kept
+            between processes.  The default is to keep it in memory.
+        page_size : int
+            The number of releases requested per page when polling for
+            new releases.  The first synchronization uses the default
+            page size of :class:`~replicated.core.ReleasesSlice`.
+
+        """
+        self.app = app
+        self.path = path
+        self.page_size = page_size
+        self._sequence = None
+        self._editable = {}
+        if path is not None:
+            state = self._load().get(app.id)
+            if state is not None:
+                self._sequence = state['sequence']
+                self._editable = dict(
+                    (int(sequence), edited_at)
+                    for sequence, edited_at in state['editable'].items())
+
+    @property
+    def sequence(self):
+        """The sequence of the newest release seen, or ``None`` before
+        the first synchronization.
+
+        """
+        return self._sequence
+
+    def sync(self):
+        """Return the releases created, edited or made non-editable
+        since the previous synchronization, newest first.
+
+        """
+        sequence = self._sequence
+        editable = self._editable
+        releases = self.app.releases
+        if sequence is None:
+            releases = releases.iterate()
+        else:
+            floor = _sync_floor(sequence, editable)
+            releases = releases.since(floor, page_size=self.page_size)
+
+        changed = []
+        still_editable = {}
+        newest = sequence
+        for release in releases:
+            if sequence is None or release.sequence > sequence:
+                changed.append(release)
+            elif release.sequence in editable and (
+                    not release.editable or
+                    release.edited_at != editable[release.sequence]):
+                changed.append(release)
+            if release.editable:
+                still_editable[release.sequence] = release.edited_at
+            if newest is None or release.sequence > newest:
+                newest = release.sequence
+
+        self._sequence = newest
+        self._editable = still_editable
+        if self.path is not None:
+            self._save()
+        return changed
+
+    def _load(self):
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except IOError:
+            return {}
+
+    def _save(self):
+        states = self._load()
+        states[self.app.id] = {
+            'sequence': self._sequence,
+            'editable': dict(
+                (str(sequence), edited_at)
+                for sequence, edited_at in self._editable.items()),
+        }
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as fh:
+            json.dump(states, fh, indent=2, sort_keys=True)
+        if os.path.exists(self.path) and os.name == 'nt':
+            os.remove(self.path)
+        os.rename(temporary, self.path)
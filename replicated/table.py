@@ -0,0 +1,214 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""A compact, column-oriented view of the licenses of an application.
+
+"""
+from array import array
+
+import six
+
+from .session import _bound_session
+
+
+#: The columns of a :class:`~LicenseTable`: the :class:`~License`
+#: attribute, the key in the license JSON and the array typecode used to
+#: store it, or ``None`` for columns stored as lists of objects.
+LICENSE_COLUMNS = (
+    ('id', 'Id', None),
+    ('channel_id', 'ChannelId', None),
+    ('assignee', 'Assignee', None),
+    ('update_policy', 'UpdatePolicy', None),
+    ('archived', 'Archived', 'B'),
+    ('grant_date', 'GrantDate', None),
+    ('expire_date', 'ExpireDate', None),
+    ('expiration_policy', 'ExpirationPolicy', None),
+    ('revokation_date', 'RevokationDate', None),
+    ('anonymous', 'Anonymous', 'B'),
+    ('field_values', 'FieldValues', None),
+    ('billing', 'Billing', None),
+    ('require_activation', 'RequireActivation', 'B'),
+    ('activation_email', 'ActivationEmail', None),
+    ('last_sync', 'LastSync', None),
+    ('inactive_instance_count', 'InactiveInstanceCount', 'l'),
+    ('active_instance_count', 'ActiveInstanceCount', 'l'),
+    ('untracked_instance_count', 'UntrackedInstanceCount', 'l'),
+    ('is_instance_tracked', 'IsInstanceTracked', 'B'),
+)
+
+_COLUMN_NAMES = frozenset(name for name, _, _ in LICENSE_COLUMNS)
+
+
+class LicenseTable(object):
+    """The licenses of an application stored column by column.
+
+    Numeric and boolean columns are stored in :class:`array.array`
+    objects, and repeated strings such as channel IDs and dates are
+    shared, so a table holds tens of thousands of licenses in a
+    fraction of the memory of the equivalent :class:`~License`
+    objects.  Aggregate queries work directly on the columns::
+
+        >>> table = app.license_table()
+        >>> table.sum('active_instance_count')
+        >>> table.group_by('channel_id', 'active_instance_count')
+
+    Individual rows are turned into :class:`~License` objects on
+    demand by indexing or iterating over the table.
+
+    """
+
+    def __init__(self, app, session=None):
+        """Create an empty :class:`~LicenseTable`.
+
+        Parameters
+        ----------
+        app : App
+            The application that owns the licenses.
+        session : requests.Session
+            The requests Session given to the :class:`~License`
+            objects created from the table.
+
+        """
+        self.app = app
+        self._session = _bound_session(session)
+        self._columns = dict(
+            (name, [] if typecode is None else array(typecode))
+            for name, _, typecode in LICENSE_COLUMNS)
+        self._strings = {}
+
+    @classmethod
+    def from_json(cls, licenses_json, app, session=None):
+        """Create a :class:`~LicenseTable` from the license list JSON
+        returned by the Replicated API.
+
+        """
+        table = cls(app, session=session)
+        for license_json in licenses_json:
+            table.append_json(license_json)
+        return table
+
+    def append_json(self, license_json):
+        """Append one license given as JSON returned by the Replicated
+        API.
+
+        """
+        assert license_json['AppId'] == self.app.id
+        strings = self._strings
+        for name, key, typecode in LICENSE_COLUMNS:
+            value = license_json[key]
+            if typecode is not None:
+                value = int(value)
+            elif isinstance(value, six.string_types):
+                value = strings.setdefault(value, value)
+            self._columns[name].append(value)
+
+    def __len__(self):
+        return len(self._columns['id'])
+
+    def __getitem__(self, index):
+        """Return the :class:`~License` of row ``index``.
+
+        """
+        return self._license(index, self.app.channels_by_id)
+
+    def __iter__(self):
+        channels = self.app.channels_by_id
+        for index in range(len(self)):
+            yield self._license(index, channels)
+
+    def _license(self, index, channels):
+        from .core import License
+        row = self._row(index)
+        channel = channels[row.pop('channel_id')]
+        row['update_policy'] = License.UpdatePolicy[row['update_policy']]
+        for name, _, typecode in LICENSE_COLUMNS:
+            if typecode == 'B':
+                row[name] = bool(row[name])
+        instance = License(app=self.app, channel=channel, **row)
+        instance._session = self._session
+        return instance
+
+    def _row(self, index):
+        return dict(
+            (name, self._columns[name][index])
+            for name, _, _ in LICENSE_COLUMNS)
+
+    def column(self, name):
+        """Return the column ``name``.
+
+        The column is returned as stored, as an :class:`array.array`
+        for numeric and boolean columns and a list otherwise, and
+        should not be modified.
+
+        """
+        if name not in _COLUMN_NAMES:
+            raise KeyError('Unknown license column {0!r}'.format(name))
+        return self._columns[name]
+
+    def _mask(self, where):
+        """Return the indices selected by ``where``, a mapping of column
+        names to required values, or ``None`` for all rows.
+
+        """
+        if not where:
+            return None
+        conditions = [
+            (self.column(name), int(value) if isinstance(value, bool)
+             else value)
+            for name, value in where.items()
+        ]
+        return [
+            index for index in range(len(self))
+            if all(column[index] == value for column, value in conditions)
+        ]
+
+    def count(self, **where):
+        """Count the licenses whose columns equal the given values::
+
+            >>> table.count(archived=False, channel_id=channel.id)
+
+        """
+        mask = self._mask(where)
+        return len(self) if mask is None else len(mask)
+
+    def sum(self, column, **where):
+        """Sum a numeric column over the licenses whose columns equal
+        the given values.
+
+        """
+        values = self.column(column)
+        mask = self._mask(where)
+        if mask is None:
+            return sum(values)
+        return sum(values[index] for index in mask)
+
+    def group_by(self, by, column=None, **where):
+        """Aggregate the licenses by the values of column ``by``.
+
+        Parameters
+        ----------
+        by : str
+            The column whose values define the groups.
+        column : str
+            The numeric column to sum in each group.  The default is
+            to count the licenses of each group.
+        **where
+            Only licenses whose columns equal these values are
+            aggregated.
+
+        Returns
+        -------
+        groups : dict
+            A mapping of the values of ``by`` to the count or sum of
+            each group.
+
+        """
+        keys = self.column(by)
+        values = None if column is None else self.column(column)
+        mask = self._mask(where)
+        indices = range(len(self)) if mask is None else mask
+        groups = {}
+        for index in indices:
+            key = keys[index]
+            value = 1 if values is None else values[index]
+            groups[key] = groups.get(key, 0) + value
+        return groups
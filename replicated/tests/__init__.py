@@ -0,0 +1,2 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
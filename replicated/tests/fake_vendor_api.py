@@ -0,0 +1,452 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+"""An in-process stand-in for the Replicated Vendor API.
+
+The stand-in serves the endpoints used by :mod:`replicated.core` from
+generated in-memory data, with an optional delay per request to
+simulate network latency.  List responses carry an ``ETag`` header and
+honour ``If-None-Match``.  Requests for unknown applications, releases
+or licenses get a ``404`` response.
+
+"""
+from __future__ import print_function
+
+import hashlib
+import json
+import re
+import socket
+import sys
+import threading
+import time
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import parse_qs, urlsplit
+
+
+_TIMESTAMP = '2016-01-01T00:00:00Z'
+
+_RELEASE_CONFIG = u'''\
+---
+replicated_api_version: 2.3.5
+name: "Benchmark"
+version: "{version}"
+release_notes: "Release {sequence}"
+components:
+- name: app
+  containers:
+  - source: public
+    image_name: benchmark/app
+    version: "{sequence}"
+'''
+
+
+class FakeVendorData(object):
+    """The applications, channels, releases and licenses served by
+    :class:`~FakeVendorAPI`.
+
+    """
+
+    def __init__(self, apps=1, channels=10, releases=2000, licenses=20000):
+        self.lock = threading.Lock()
+        self.apps = {}
+        for app_index in range(apps):
+            app_id = 'app{0}'.format(app_index)
+            app = {
+                'json': {
+                    'Id': app_id,
+                    'Name': 'Benchmark App {0}'.format(app_index),
+                    'Slug': 'benchmark-app-{0}'.format(app_index),
+                },
+                'channels': [],
+                'releases': {},
+                'licenses': [],
+                'bodies': {},
+            }
+            self.apps[app_id] = app
+            for sequence in range(1, releases + 1):
+                self.add_release(app, sequence)
+            for index in range(channels):
+                self.add_channel(app, 'Channel {0}'.format(index),
+                                 releases - index)
+            channel_ids = [ch['Id'] for ch in app['channels']]
+            for index in range(licenses):
+                self.add_license(
+                    app, 'customer-{0}'.format(index),
+                    channel_ids[index % len(channel_ids)])
+
+    def add_release(self, app, sequence):
+        release = {
+            'AppId': app['json']['Id'],
+            'Sequence': sequence,
+            'Version': '1.0.{0}'.format(sequence),
+            'Editable': False,
+            'CreatedAt': _TIMESTAMP,
+            'EditedAt': _TIMESTAMP,
+            'ActiveChannels': [],
+            'Config': _RELEASE_CONFIG.format(
+                version='1.0.{0}'.format(sequence), sequence=sequence),
+        }
+        app['releases'][sequence] = release
+        app['bodies'].clear()
+        return release
+
+    def add_channel(self, app, name, release_sequence=0):
+        channel = {
+            'Id': '{0}-channel{1}'.format(
+                app['json']['Id'], len(app['channels'])),
+            'Name': name,
+            'Position': len(app['channels']),
+            'ReleaseSequence': release_sequence,
+            'ReleaseLabel': '1.0.{0}'.format(release_sequence),
+            'ReleaseNotes': '',
+        }
+        app['channels'].append(channel)
+        release = app['releases'].get(release_sequence)
+        if release is not None:
+            release['ActiveChannels'].append({'Id': channel['Id']})
+        app['bodies'].clear()
+        return channel
+
+    def add_license(self, app, assignee, channel_id):
+        license = {
+            'Id': '{0}-license{1}'.format(
+                app['json']['Id'], len(app['licenses'])),
+            'AppId': app['json']['Id'],
+            'ChannelId': channel_id,
+            'Assignee': assignee,
+            'UpdatePolicy': 'manual',
+            'Archived': False,
+            'GrantDate': _TIMESTAMP,
+            'ExpireDate': None,
+            'ExpirationPolicy': 'ignore',
+            'RevokationDate': None,
+            'Anonymous': False,
+            'FieldValues': [],
+            'Billing': None,
+            'RequireActivation': False,
+            'ActivationEmail': '',
+            'LastSync': _TIMESTAMP,
+            'InactiveInstanceCount': len(app['licenses']) % 3,
+            'ActiveInstanceCount': len(app['licenses']) % 5,
+            'UntrackedInstanceCount': 0,
+            'IsInstanceTracked': True,
+        }
+        app['licenses'].append(license)
+        app['bodies'].clear()
+        return license
+
+    def body(self, app, key, build):
+        """Return the serialized body ``key`` of ``app``, building it
+        with ``build`` if it is not already cached.
+
+        """
+        body = app['bodies'].get(key)
+        if body is None:
+            body = app['bodies'][key] = json.dumps(build()).encode('utf-8')
+        return body
+
+    def releases_desc(self, app):
+        """Return the releases of ``app`` as listed by the API, newest
+        first and without their configuration.
+
+        """
+        listing = app['bodies'].get('listing')
+        if listing is None:
+            listing = app['bodies']['listing'] = [
+                dict((key, value)
+                     for key, value in app['releases'][sequence].items()
+                     if key != 'Config')
+                for sequence in sorted(app['releases'], reverse=True)
+            ]
+        return listing
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Send responses without waiting for the ACK of previous segments,
+    # which would stall keep-alive connections by the delayed-ACK time.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _dispatch(self, method):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+        parts = urlsplit(self.path)
+        path = parts.path[len(server.prefix):]
+        query = parse_qs(parts.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        for route_method, pattern, handler in _ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if match is not None:
+                with server.data.lock:
+                    try:
+                        result = handler(
+                            server.data, query, body, *match.groups())
+                    except KeyError:
+                        result = 404, json.dumps(
+                            {'error': 'Not found'}).encode('utf-8')
+                self._send(*result)
+                return
+        self._send(404, json.dumps({'error': path}).encode('utf-8'))
+
+    def _send(self, status, body=b'', content_type='application/json',
+              etag=False):
+        headers = [('Content-Type', content_type)]
+        if etag and status == 200:
+            tag = '"{0}"'.format(hashlib.md5(body).hexdigest())
+            headers.append(('ETag', tag))
+            if self.headers.get('If-None-Match') == tag:
+                status, body = 304, b''
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _get_apps(data, query, body):
+    return 200, json.dumps([
+        {'App': app['json'], 'Channels': app['channels']}
+        for app in data.apps.values()
+    ]).encode('utf-8'), 'application/json', True
+
+
+def _get_channels(data, query, body, app_id):
+    app = data.apps[app_id]
+    return 200, json.dumps(app['channels']).encode('utf-8'), \
+        'application/json', True
+
+
+def _get_releases(data, query, body, app_id):
+    app = data.apps[app_id]
+    return 200, data.body(app, 'releases', lambda: data.releases_desc(app)), \
+        'application/json', True
+
+
+def _get_releases_paged(data, query, body, app_id):
+    app = data.apps[app_id]
+    start = int(query.get('start', ['0'])[0])
+    count = int(query.get('count', ['20'])[0])
+
+    def build():
+        releases = data.releases_desc(app)
+        return {
+            'releases': releases[start:start + count],
+            'totalCount': len(releases),
+        }
+    return 200, data.body(app, ('paged', start, count), build), \
+        'application/json', True
+
+
+def _get_licenses(data, query, body, app_id):
+    app = data.apps[app_id]
+    return 200, data.body(app, 'licenses', lambda: app['licenses']), \
+        'application/json', True
+
+
+def _get_properties(data, query, body, app_id, sequence):
+    release = data.apps[app_id]['releases'][int(sequence)]
+    return 200, json.dumps(release).encode('utf-8'), 'application/json', True
+
+
+def _put_raw(data, query, body, app_id, sequence):
+    app = data.apps[app_id]
+    release = app['releases'][int(sequence)]
+    release['Config'] = body.decode('utf-8')
+    release['EditedAt'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    app['bodies'].clear()
+    return 200, b'{}'
+
+
+def _post_release(data, query, body, app_id):
+    app = data.apps[app_id]
+    release = data.add_release(app, max(app['releases'] or [0]) + 1)
+    release['Editable'] = True
+    return 201, json.dumps(release).encode('utf-8')
+
+
+def _post_archive(data, query, body, app_id, sequence):
+    app = data.apps[app_id]
+    app['releases'].pop(int(sequence), None)
+    app['bodies'].clear()
+    return 204, b''
+
+
+def _post_promote(data, query, body, app_id, sequence):
+    app = data.apps[app_id]
+    channel_ids = set(json.loads(body.decode('utf-8'))['channels'])
+    for release in app['releases'].values():
+        release['ActiveChannels'] = [
+            ch for ch in release['ActiveChannels']
+            if ch['Id'] not in channel_ids]
+    release = app['releases'][int(sequence)]
+    release['Editable'] = False
+    for channel in app['channels']:
+        if channel['Id'] in channel_ids:
+            channel['ReleaseSequence'] = release['Sequence']
+            channel['ReleaseLabel'] = release['Version']
+            release['ActiveChannels'].append({'Id': channel['Id']})
+    app['bodies'].clear()
+    return 204, b''
+
+
+def _post_channel(data, query, body, app_id):
+    app = data.apps[app_id]
+    data.add_channel(app, json.loads(body.decode('utf-8'))['name'])
+    return 200, json.dumps(app['channels']).encode('utf-8')
+
+
+def _post_license(data, query, body):
+    request = json.loads(body.decode('utf-8'))
+    app = data.apps[request['app_id']]
+    license = data.add_license(
+        app, request['assignee'], request['channel_id'])
+    return 201, json.dumps(license).encode('utf-8')
+
+
+def _get_license_key(data, query, body, license_id):
+    key = 'LICENSE-KEY-{0}'.format(license_id)
+    return 200, key.encode('utf-8'), 'text/plain'
+
+
+_ROUTES = [
+    (method, re.compile('^' + pattern + '$'), handler)
+    for method, pattern, handler in [
+        ('GET', r'/apps', _get_apps),
+        ('GET', r'/app/([^/]+)/channels', _get_channels),
+        ('GET', r'/app/([^/]+)/releases', _get_releases),
+        ('GET', r'/app/([^/]+)/releases/paged', _get_releases_paged),
+        ('GET', r'/app/([^/]+)/licenses', _get_licenses),
+        ('GET', r'/app/([^/]+)/(\d+)/properties', _get_properties),
+        ('PUT', r'/app/([^/]+)/(\d+)/raw', _put_raw),
+        ('POST', r'/app/([^/]+)/release', _post_release),
+        ('POST', r'/app/([^/]+)/(\d+)/archive', _post_archive),
+        ('POST', r'/app/([^/]+)/(\d+)/promote', _post_promote),
+        ('POST', r'/app/([^/]+)/channel', _post_channel),
+        ('POST', r'/license', _post_license),
+        ('GET', r'/licensekey/([^/]+)', _get_license_key),
+    ]
+]
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, data, latency, prefix):
+        HTTPServer.__init__(self, address, _Handler)
+        self.data = data
+        self.latency = latency
+        self.prefix = prefix
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    def count_request(self):
+        with self._count_lock:
+            self.request_count += 1
+
+    def handle_error(self, request, client_address):
+        # Clients may drop the connection, as when a streamed response
+        # is closed before it has been read.
+        if not isinstance(sys.exc_info()[1], socket.error):
+            HTTPServer.handle_error(self, request, client_address)
+
+
+class FakeVendorAPI(object):
+    """A local HTTP server standing in for the Vendor API.
+
+    While the server is running, as a context manager,
+    :attr:`replicated.core.ReplicatedVendorAPI.base_url` points to it::
+
+        >>> with FakeVendorAPI(releases=5000, latency=0.02) as server:
+        ...     api = ReplicatedVendorAPI('token')
+        ...     apps = api.get_apps()
+
+    """
+
+    prefix = '/vendor/v1'
+
+    def __init__(self, apps=1, channels=10, releases=2000, licenses=20000,
+                 latency=0.0):
+        """Create a :class:`~FakeVendorAPI`.
+
+        Parameters
+        ----------
+        apps : int
+            The number of applications.
+        channels : int
+            The number of channels of each application.
+        releases : int
+            The number of releases of each application.
+        licenses : int
+            The number of licenses of each application.
+        latency : float
+            The delay, in seconds, added to each request.
+
+        """
+        self.data = FakeVendorData(
+            apps=apps, channels=channels, releases=releases,
+            licenses=licenses)
+        self.latency = latency
+        self._server = None
+        self._thread = None
+        self._previous_base_url = None
+
+    @property
+    def url(self):
+        """The base URL of the running server.
+
+        """
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}{2}'.format(host, port, self.prefix)
+
+    @property
+    def request_count(self):
+        """The number of requests received by the server.
+
+        """
+        return self._server.request_count
+
+    def start(self):
+        self._server = _Server(
+            ('127.0.0.1', 0), self.data, self.latency, self.prefix)
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        from replicated.core import ReplicatedVendorAPI
+        self.start()
+        self._previous_base_url = ReplicatedVendorAPI.base_url
+        ReplicatedVendorAPI.base_url = self.url
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        from replicated.core import ReplicatedVendorAPI
+        ReplicatedVendorAPI.base_url = self._previous_base_url
+        self.stop()
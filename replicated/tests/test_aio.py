@@ -0,0 +1,151 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import unittest
+
+try:
+    import asyncio
+    from replicated.aio import AsyncReplicatedVendorAPI
+except (ImportError, SyntaxError):  # pragma: no cover
+    AsyncReplicatedVendorAPI = None
+
+from replicated.exceptions import ReplicatedError
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+CONFIG = u'''\
+---
+replicated_api_version: 2.3.5
+name: "Test"
+version: "3.1.4"
+components: []
+'''
+
+
+@unittest.skipIf(AsyncReplicatedVendorAPI is None,
+                 'Requires Python 3.6 and aiohttp')
+class TestAsyncReplicatedVendorAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=250, licenses=4)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.api = AsyncReplicatedVendorAPI('token')
+        self.addCleanup(lambda: self.wait(self.api.close()))
+        self.app, = self.wait(self.api.get_apps())
+        self.data = self.server.data.apps['app0']
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def sequences(self, releases):
+        return [release.sequence for release in releases]
+
+    def test_get_apps(self):
+        self.assertEqual(self.app.id, 'app0')
+        self.assertEqual(
+            [channel.name for channel in self.app.channels],
+            ['Channel 0', 'Channel 1'])
+
+    def test_get_releases_page(self):
+        # When
+        releases = self.wait(
+            self.api.get_releases(self.app, start=3, count=5))
+
+        # Then
+        self.assertEqual(self.sequences(releases), [247, 246, 245, 244, 243])
+
+    def test_get_all_releases(self):
+        # Given
+        count = self.server.request_count
+
+        # When
+        releases = self.wait(self.api.get_releases(self.app, start=2))
+
+        # Then
+        self.assertEqual(self.sequences(releases), list(range(248, 0, -1)))
+        # Pages of 100, 100 and 48 releases.
+        self.assertEqual(self.server.request_count, count + 3)
+
+    def test_create_release(self):
+        # When
+        release = self.wait(self.api.create_release(self.app))
+
+        # Then
+        self.assertEqual(release.sequence, 251)
+        self.assertTrue(release.editable)
+        self.assertIsNotNone(release.created_at)
+        self.assertTrue(self.data['releases'][251]['Editable'])
+
+    def test_set_config(self):
+        # Given
+        release = self.wait(self.api.create_release(self.app))
+
+        # When
+        self.wait(self.api.set_config(release, CONFIG))
+
+        # Then
+        self.assertEqual(release.version, u'3.1.4')
+        self.assertEqual(release.config, CONFIG)
+        self.assertEqual(self.data['releases'][251]['Config'], CONFIG)
+        with self.assertRaises(ValueError):
+            self.wait(self.api.set_config(release, b'version: 1'))
+
+    def test_promote_and_archive(self):
+        # Given
+        release, = self.wait(
+            self.api.get_releases(self.app, start=5, count=1))
+        channel = self.app.channels[1]
+
+        # When
+        self.wait(self.api.promote(release, [channel], label='2.0'))
+        self.wait(self.api.archive(release))
+
+        # Then
+        self.assertEqual(self.data['channels'][1]['ReleaseSequence'], 245)
+        self.assertNotIn(245, self.data['releases'])
+
+    def test_create_license(self):
+        # Given
+        channel = self.app.channels[0]
+
+        # When
+        license = self.wait(
+            self.api.create_license(channel, 'new-customer'))
+
+        # Then
+        self.assertEqual(license.assignee, 'new-customer')
+        self.assertEqual(len(self.data['licenses']), 5)
+        with self.assertRaises(ValueError):
+            self.wait(self.api.create_license(channel, 'new-customer'))
+        with self.assertRaises(ValueError):
+            self.wait(self.api.create_license(channel, 'customer-0'))
+        self.assertEqual(len(self.data['licenses']), 5)
+
+    def test_error_status(self):
+        # Given
+        release, = self.wait(self.api.get_releases(self.app, count=1))
+        self.wait(self.api.archive(release))
+
+        # When
+        with self.assertRaises(ReplicatedError) as context:
+            self.wait(self.api.refresh(release))
+
+        # Then
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_unbound_objects(self):
+        # Given
+        release, = self.wait(self.api.get_releases(self.app, count=1))
+        license = self.wait(self.api.get_licenses(self.app))[0]
+
+        # When/Then
+        with self.assertRaises(RuntimeError):
+            release.config
+        with self.assertRaises(RuntimeError):
+            license.value
+
+
+if __name__ == '__main__':
+    unittest.main()
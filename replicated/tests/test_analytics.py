@@ -0,0 +1,144 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import unittest
+
+try:
+    import numpy as np
+    from replicated.analytics import (
+        expiry_forecast, group_by, license_array, parse_dates)
+except ImportError:  # pragma: no cover
+    np = None
+
+from replicated.core import ReplicatedVendorAPI
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+@unittest.skipIf(np is None, 'Requires NumPy')
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=3, licenses=10)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        data = self.server.data.apps['app0']
+        licenses = data['licenses']
+        licenses[1]['Archived'] = True
+        licenses[1]['ExpireDate'] = '2016-03-10T00:00:00Z'
+        licenses[2]['ExpireDate'] = '2016-01-31T23:59:59Z'
+        licenses[3]['ExpireDate'] = '2016-03-01T00:00:00Z'
+        licenses[4]['ExpireDate'] = '2015-12-31T00:00:00Z'
+        licenses[5]['ExpireDate'] = '2017-01-01T00:00:00Z'
+        licenses[6]['UpdatePolicy'] = 'automatic'
+        data['bodies'].clear()
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+        self.licenses = license_array(self.app.license_table())
+
+    def test_parse_dates(self):
+        # When
+        dates = parse_dates(
+            ['2016-01-01T12:30:00Z', None, '', '2016-02-01T00:00:00'])
+
+        # Then
+        self.assertEqual(dates.dtype, np.dtype('datetime64[s]'))
+        self.assertEqual(
+            dates[0], np.datetime64('2016-01-01T12:30:00', 's'))
+        self.assertEqual(np.isnat(dates).tolist(), [False, True, True, False])
+        self.assertEqual(dates[3], np.datetime64('2016-02-01', 's'))
+
+    def test_license_array(self):
+        # When
+        licenses = self.licenses
+
+        # Then
+        self.assertEqual(len(licenses), 10)
+        self.assertEqual(
+            licenses['id'].tolist(),
+            ['app0-license{0}'.format(index) for index in range(10)])
+        self.assertEqual(licenses['assignee'][3], 'customer-3')
+        self.assertEqual(licenses['update_policy'][6], 'automatic')
+        self.assertEqual(
+            licenses['archived'].tolist(),
+            [index == 1 for index in range(10)])
+        self.assertEqual(
+            licenses['active_instance_count'].tolist(),
+            [index % 5 for index in range(10)])
+        self.assertEqual(
+            np.isnat(licenses['expire_date']).sum(), 5)
+        self.assertTrue(np.isnat(licenses['revokation_date']).all())
+
+    def test_license_array_from_licenses(self):
+        # When
+        licenses = license_array(self.app.licenses)
+
+        # Then
+        self.assertEqual(licenses.dtype, self.licenses.dtype)
+        for name in licenses.dtype.names:
+            if licenses.dtype[name].kind == 'M':
+                np.testing.assert_array_equal(
+                    np.isnat(licenses[name]), np.isnat(self.licenses[name]))
+                known = ~np.isnat(licenses[name])
+                np.testing.assert_array_equal(
+                    licenses[name][known], self.licenses[name][known])
+            else:
+                self.assertEqual(
+                    licenses[name].tolist(), self.licenses[name].tolist(),
+                    name)
+
+    def test_group_by(self):
+        # When
+        groups = group_by(self.licenses, 'channel_id')
+
+        # Then
+        self.assertEqual(sorted(groups), ['app0-channel0', 'app0-channel1'])
+        even = groups['app0-channel0']
+        self.assertEqual(even['licenses'], 5)
+        self.assertEqual(
+            even['active_instance_count'],
+            sum(index % 5 for index in range(0, 10, 2)))
+        self.assertEqual(
+            even['inactive_instance_count'],
+            sum(index % 3 for index in range(0, 10, 2)))
+        self.assertEqual(even['untracked_instance_count'], 0)
+
+    def test_group_by_tuple_with_mask(self):
+        # When
+        groups = group_by(
+            self.licenses, ('channel_id', 'update_policy'),
+            fields=('active_instance_count',),
+            mask=~self.licenses['archived'])
+
+        # Then
+        self.assertEqual(groups, {
+            ('app0-channel0', 'automatic'): {
+                'licenses': 1, 'active_instance_count': 1},
+            ('app0-channel0', 'manual'): {
+                'licenses': 4, 'active_instance_count': 0 + 2 + 4 + 3},
+            ('app0-channel1', 'manual'): {
+                'licenses': 4, 'active_instance_count': 3 + 0 + 2 + 4},
+        })
+
+    def test_expiry_forecast(self):
+        # When
+        periods, counts = expiry_forecast(
+            self.licenses, start='2016-01-15', periods=4)
+
+        # Then
+        self.assertEqual(
+            periods.tolist(), np.arange(
+                '2016-01', '2016-05', dtype='datetime64[M]').tolist())
+        self.assertEqual(counts.tolist(), [1, 0, 2, 0])
+
+    def test_expiry_forecast_with_mask(self):
+        # When
+        periods, counts = expiry_forecast(
+            self.licenses, unit='D', start='2016-03-01', periods=10,
+            mask=~self.licenses['archived'])
+
+        # Then
+        self.assertEqual(periods[0], np.datetime64('2016-03-01'))
+        self.assertEqual(counts.tolist(), [1] + [0] * 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import threading
+import unittest
+
+import requests
+
+from replicated.batch import is_transient, run_batch
+from replicated.core import Release, ReplicatedVendorAPI
+from replicated.exceptions import ReplicatedError
+from replicated.retry import RetryPolicy
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def test_is_transient(self):
+        self.assertTrue(is_transient(ReplicatedError('', 503)))
+        self.assertTrue(is_transient(ReplicatedError('', 429)))
+        self.assertTrue(is_transient(requests.ConnectionError()))
+        self.assertFalse(is_transient(ReplicatedError('', 404)))
+        self.assertFalse(is_transient(ValueError()))
+
+    def test_results_in_order(self):
+        # When
+        results = run_batch(lambda item: item * 2, range(20), max_workers=3)
+
+        # Then
+        self.assertEqual([result.item for result in results], list(range(20)))
+        self.assertEqual(
+            [result.value for result in results], list(range(0, 40, 2)))
+        self.assertTrue(all(result.ok for result in results))
+
+    def test_retries(self):
+        # Given
+        lock = threading.Lock()
+        calls = {}
+
+        def func(item):
+            with lock:
+                calls[item] = calls.get(item, 0) + 1
+            if item == 'flaky' and calls[item] < 3:
+                raise ReplicatedError('Unavailable', 503)
+            if item == 'broken':
+                raise ReplicatedError('Bad request', 400)
+            return item
+
+        # When
+        results = run_batch(
+            func, ['flaky', 'broken', 'fine'], retries=2, backoff=0.001)
+
+        # Then
+        flaky, broken, fine = results
+        self.assertTrue(flaky.ok)
+        self.assertEqual(flaky.attempts, 3)
+        self.assertFalse(broken.ok)
+        self.assertEqual(broken.error.status_code, 400)
+        self.assertEqual(broken.attempts, 1)
+        self.assertEqual(fine.attempts, 1)
+
+    def test_transient_predicate(self):
+        # Given
+        def func(item):
+            raise ReplicatedError('Too many requests', 429)
+
+        # When
+        result, = run_batch(
+            func, [1], retries=2, backoff=0.001,
+            transient=lambda error: False)
+
+        # Then
+        self.assertEqual(result.attempts, 1)
+
+    def test_progress(self):
+        # Given
+        seen = []
+
+        # When
+        run_batch(lambda item: item, range(5), progress=seen.append)
+
+        # Then
+        self.assertEqual(
+            sorted(result.item for result in seen), [0, 1, 2, 3, 4])
+
+
+class TestPromoteReleases(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=5, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def promote_failing(self, api, status_code):
+        attempts = []
+        original = Release.promote
+
+        def promote(release, *args, **kwargs):
+            attempts.append(release.sequence)
+            raise ReplicatedError('Failed', status_code)
+
+        Release.promote = promote
+        try:
+            app = api.get_app(id='app0')
+            release, = app.releases[0:1]
+            result, = api.promote_releases([(release, app.channels)])
+        finally:
+            Release.promote = original
+        self.assertFalse(result.ok)
+        return attempts
+
+    def test_rate_limiting_left_to_the_session(self):
+        api = ReplicatedVendorAPI('token')
+        self.assertEqual(len(self.promote_failing(api, 429)), 1)
+
+    def test_rate_limiting_retried_without_session_retries(self):
+        api = ReplicatedVendorAPI('token', retry=RetryPolicy(total=0))
+        api.session.retry = None
+        self.assertEqual(len(self.promote_failing(api, 429)), 3)
+
+    def test_server_errors_retried(self):
+        api = ReplicatedVendorAPI('token')
+        self.assertEqual(len(self.promote_failing(api, 503)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
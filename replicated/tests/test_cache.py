@@ -0,0 +1,480 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from replicated.cache import ConfigCache, ResponseCache, ValidatorCache
+from replicated.core import ReplicatedVendorAPI
+from replicated.session import VendorSession
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+def make_response(status_code=200, headers=None, content=b'[]'):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = content
+    return response
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestValidatorCache(unittest.TestCase):
+
+    def test_conditional_headers_etag(self):
+        # Given
+        response = make_response(headers={'ETag': '"abc"'})
+
+        # When
+        headers = ValidatorCache.conditional_headers(response)
+
+        # Then
+        self.assertEqual(headers, {'If-None-Match': '"abc"'})
+
+    def test_conditional_headers_last_modified(self):
+        # Given
+        last_modified = 'Fri, 01 Jan 2016 00:00:00 GMT'
+        response = make_response(headers={
+            'ETag': '"abc"', 'Last-Modified': last_modified})
+        original = {'Accept': 'application/json'}
+
+        # When
+        headers = ValidatorCache.conditional_headers(response, original)
+
+        # Then
+        self.assertEqual(headers, {
+            'Accept': 'application/json',
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': last_modified,
+        })
+        self.assertEqual(original, {'Accept': 'application/json'})
+
+    def test_conditional_headers_without_validators(self):
+        # Given
+        response = make_response()
+
+        # When
+        headers = ValidatorCache.conditional_headers(response, {'A': 'b'})
+
+        # Then
+        self.assertEqual(headers, {'A': 'b'})
+
+    def test_set_requires_validators(self):
+        # Given
+        validators = ValidatorCache(maxsize=2)
+        response = make_response(headers={'ETag': '"abc"'})
+
+        # When
+        validators.set('/a', make_response())
+        validators.set('/b', response)
+
+        # Then
+        self.assertIsNone(validators.get('/a'))
+        self.assertIs(validators.get('/b'), response)
+
+    def test_eviction(self):
+        # Given
+        validators = ValidatorCache(maxsize=2)
+        responses = [
+            make_response(headers={'ETag': '"{0}"'.format(index)})
+            for index in range(3)]
+
+        # When
+        validators.set('/0', responses[0])
+        validators.set('/1', responses[1])
+        validators.get('/0')
+        validators.set('/2', responses[2])
+
+        # Then
+        self.assertIs(validators.get('/0'), responses[0])
+        self.assertIsNone(validators.get('/1'))
+        self.assertIs(validators.get('/2'), responses[2])
+
+
+class TestResponseCache(unittest.TestCase):
+
+    base = 'http://vendor.test/vendor/v1'
+
+    def test_expiry(self):
+        # Given
+        clock = FakeClock()
+        cache = ResponseCache(clock=clock)
+        url = self.base + '/app/app0/releases'
+        response = make_response()
+
+        # When
+        cache.set(url, '/app/{app_id}/releases', response)
+
+        # Then
+        self.assertIs(cache.get(url), response)
+        clock.now += 29.9
+        self.assertIs(cache.get(url), response)
+        clock.now += 0.1
+        self.assertIsNone(cache.get(url))
+
+    def test_ttl_overrides(self):
+        # Given
+        clock = FakeClock()
+        cache = ResponseCache(clock=clock, ttls={
+            '/apps': 0, '/app/{app_id}/licenses': 600})
+        apps_url = self.base + '/apps'
+        licenses_url = self.base + '/app/app0/licenses'
+        channels_url = self.base + '/app/app0/channels'
+
+        # When
+        cache.set(apps_url, '/apps', make_response())
+        cache.set(licenses_url, '/app/{app_id}/licenses', make_response())
+        cache.set(channels_url, '/app/{app_id}/channels', make_response())
+        cache.set(self.base + '/other', '/other', make_response())
+        clock.now += 300
+
+        # Then
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(apps_url))
+        self.assertIsNotNone(cache.get(licenses_url))
+        self.assertIsNone(cache.get(channels_url))
+        self.assertEqual(ResponseCache.default_ttls['/apps'], 60)
+
+    def test_eviction(self):
+        # Given
+        cache = ResponseCache(maxsize=2)
+        urls = [self.base + '/licensekey/{0}'.format(index)
+                for index in range(3)]
+        responses = [make_response() for _ in urls]
+
+        # When
+        cache.set(urls[0], '/licensekey/{license_id}', responses[0])
+        cache.set(urls[1], '/licensekey/{license_id}', responses[1])
+        cache.get(urls[0])
+        cache.set(urls[2], '/licensekey/{license_id}', responses[2])
+
+        # Then
+        self.assertIs(cache.get(urls[0]), responses[0])
+        self.assertIsNone(cache.get(urls[1]))
+        self.assertIs(cache.get(urls[2]), responses[2])
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            ResponseCache(maxsize=0)
+
+
+class TestVendorSessionInvalidate(unittest.TestCase):
+
+    base = 'http://vendor.test/vendor/v1'
+
+    endpoints = {
+        '/apps': '/apps',
+        '/app/app0/channels': '/app/{app_id}/channels',
+        '/app/app0/licenses': '/app/{app_id}/licenses',
+        '/app/app1/channels': '/app/{app_id}/channels',
+        '/licensekey/license0': '/licensekey/{license_id}',
+    }
+
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.session = VendorSession(cache=self.cache)
+        self.addCleanup(self.session.close)
+        for path, endpoint in self.endpoints.items():
+            self.cache.set(self.base + path, endpoint, make_response())
+
+    def cached(self):
+        return sorted(
+            path for path in self.endpoints
+            if self.cache.get(self.base + path) is not None)
+
+    def test_app_change(self):
+        # When
+        self.session.invalidate(self.base + '/app/app0/channel')
+
+        # Then
+        self.assertEqual(
+            self.cached(), ['/app/app1/channels', '/licensekey/license0'])
+
+    def test_release_change(self):
+        # When
+        self.session.invalidate(self.base + '/app/app1/12/promote')
+
+        # Then
+        self.assertEqual(self.cached(), [
+            '/app/app0/channels', '/app/app0/licenses',
+            '/licensekey/license0'])
+
+    def test_other_change(self):
+        # When
+        self.session.invalidate(self.base + '/license')
+
+        # Then
+        self.assertEqual(self.cached(), [])
+
+    def test_everything(self):
+        # When
+        self.session.invalidate()
+
+        # Then
+        self.assertEqual(self.cached(), [])
+
+    def test_invalidated_by_requests(self):
+        # Given
+        server = FakeVendorAPI(channels=2, releases=3, licenses=2)
+        server.start()
+        self.addCleanup(server.stop)
+        url = server.url + '/app/app0/channels'
+        cache = ResponseCache()
+        session = VendorSession(cache=cache)
+        self.addCleanup(session.close)
+        first = session.get(url)
+        count = server.request_count
+
+        # When
+        cached = session.get(url)
+        session.post(
+            server.url + '/app/app0/channel', json={'name': 'New'})
+        refreshed = session.get(url)
+
+        # Then
+        self.assertIs(cached, first)
+        self.assertEqual(server.request_count, count + 2)
+        self.assertEqual(len(refreshed.json()), 3)
+
+
+class TestConfigCache(unittest.TestCase):
+
+    def make_cache(self, path=':memory:', **kwargs):
+        cache = ConfigCache(path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_get_and_set(self):
+        # Given
+        cache = self.make_cache()
+
+        # When
+        cache.set('app0', 1, '2016-01-01T00:00:00Z', u'version: 1.0\n')
+
+        # Then
+        self.assertEqual(
+            cache.get('app0', 1, '2016-01-01T00:00:00Z'), u'version: 1.0\n')
+        self.assertIsNone(cache.get('app0', 1, '2016-01-02T00:00:00Z'))
+        self.assertIsNone(cache.get('app0', 2, '2016-01-01T00:00:00Z'))
+        self.assertIsNone(cache.get('app1', 1, '2016-01-01T00:00:00Z'))
+        self.assertEqual(len(cache), 1)
+
+    def test_eviction_by_size(self):
+        # Given
+        clock = FakeClock()
+        cache = self.make_cache(max_bytes=25, clock=clock)
+        for sequence in range(1, 4):
+            clock.now += 1
+            cache.set('app0', sequence, 'edited', u'x' * 8)
+        clock.now += 1
+        cache.get('app0', 1, 'edited')
+
+        # When
+        clock.now += 1
+        cache.set('app0', 4, 'edited', u'\xe9' * 6)
+
+        # Then
+        self.assertEqual(
+            [sequence for sequence in range(1, 5)
+             if cache.get('app0', sequence, 'edited') is not None],
+            [1, 4])
+
+    def test_too_large(self):
+        # Given
+        cache = self.make_cache(max_bytes=4)
+
+        # When
+        cache.set('app0', 1, 'edited', u'12345')
+
+        # Then
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate(self):
+        # Given
+        cache = self.make_cache()
+        for app_id in ('app0', 'app1'):
+            cache.set(app_id, 1, 'edited', u'config')
+
+        # When/Then
+        cache.invalidate('app0')
+        self.assertIsNone(cache.get('app0', 1, 'edited'))
+        self.assertEqual(cache.get('app1', 1, 'edited'), u'config')
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_persistent(self):
+        # Given
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'configs.db')
+        cache = ConfigCache(path)
+        cache.set('app0', 1, 'edited', u'config')
+        cache.close()
+
+        # When
+        cache = self.make_cache(path)
+
+        # Then
+        self.assertEqual(cache.get('app0', 1, 'edited'), u'config')
+
+
+class TestReleaseConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=1, releases=5, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.cache = ConfigCache(':memory:')
+        self.addCleanup(self.cache.close)
+        self.api = ReplicatedVendorAPI('token', config_cache=self.cache)
+        self.app = self.api.get_app(id='app0')
+
+    def test_cached_after_first_read(self):
+        # Given
+        release, = self.app.releases[0:1]
+        config = release.config
+        release, = self.app.releases[0:1]
+        count = self.server.request_count
+
+        # When
+        cached = release.config
+
+        # Then
+        self.assertEqual(cached, config)
+        self.assertEqual(self.server.request_count, count)
+        self.assertEqual(
+            self.cache.get('app0', 5, release.edited_at), config)
+
+    def test_new_edit_is_a_miss(self):
+        # Given
+        release, = self.app.releases[0:1]
+        release.config
+        data = self.server.data.apps['app0']
+        data['releases'][5]['EditedAt'] = '2016-02-01T00:00:00Z'
+        data['releases'][5]['Config'] += u'# edited\n'
+        data['bodies'].clear()
+        release, = self.app.releases[0:1]
+
+        # When
+        config = release.config
+
+        # Then
+        self.assertTrue(config.endswith(u'# edited\n'))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_editable_releases_bypass_the_cache(self):
+        # Given
+        self.app.create_release()
+
+        for _ in range(2):
+            release, = self.app.releases[0:1]
+            count = self.server.request_count
+
+            # When
+            release.config
+
+            # Then
+            self.assertTrue(release.editable)
+            self.assertEqual(self.server.request_count, count + 1)
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestConditionalRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=3, licenses=2)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.url = self.server.url + '/app/app0/channels'
+        self.events = []
+
+    def make_session(self, **kwargs):
+        session = VendorSession(**kwargs)
+        session.request_callbacks.append(self.events.append)
+        self.addCleanup(session.close)
+        return session
+
+    def statuses(self):
+        return [event.status_code for event in self.events]
+
+    def test_not_modified_reuses_response(self):
+        # Given
+        session = self.make_session(validators=ValidatorCache())
+        first = session.get(self.url)
+        channels = first.json()
+
+        # When
+        second = session.get(self.url)
+
+        # Then
+        self.assertEqual(self.statuses(), [200, 304])
+        self.assertIs(second, first)
+        self.assertEqual(second.status_code, 200)
+        self.assertIs(second.json(), channels)
+
+    def test_modified_replaces_response(self):
+        # Given
+        session = self.make_session(validators=ValidatorCache())
+        first = session.get(self.url)
+        app = self.server.data.apps['app0']
+        self.server.data.add_channel(app, 'New')
+
+        # When
+        second = session.get(self.url)
+        third = session.get(self.url)
+
+        # Then
+        self.assertEqual(self.statuses(), [200, 200, 304])
+        self.assertEqual(len(first.json()), 2)
+        self.assertEqual(len(second.json()), 3)
+        self.assertIs(third, second)
+
+    def test_not_modified_refreshes_response_cache(self):
+        # Given
+        clock = FakeClock()
+        cache = ResponseCache(clock=clock)
+        session = self.make_session(
+            cache=cache, validators=ValidatorCache())
+        first = session.get(self.url)
+        clock.now += 3600
+
+        # When
+        second = session.get(self.url)
+        third = session.get(self.url)
+
+        # Then
+        self.assertEqual(self.statuses(), [200, 304])
+        cached = cache.get(self.url)
+        self.assertIs(cached, first)
+        self.assertEqual(cached.status_code, 200)
+        self.assertIs(second, first)
+        self.assertIs(third, first)
+
+    def test_not_modified_without_validators_is_not_cached(self):
+        # Given
+        etag = requests.get(self.url).headers['ETag']
+        cache = ResponseCache()
+        session = self.make_session(cache=cache)
+
+        # When
+        response = session.get(self.url, headers={'If-None-Match': etag})
+
+        # Then
+        self.assertEqual(response.status_code, 304)
+        self.assertIsNone(cache.get(self.url))
+        self.assertEqual(session.get(self.url).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import unittest
+
+from replicated.config import config_digest, configs_equal, extract_version
+
+
+class TestExtractVersion(unittest.TestCase):
+
+    def test_plain_and_quoted(self):
+        self.assertEqual(extract_version(u'version: 1.2.3 # x\n'), u'1.2.3')
+        self.assertEqual(extract_version(u'version: "1.2"\n'), u'1.2')
+        self.assertEqual(extract_version(u'name: app\n'), u'')
+
+    def test_null(self):
+        for value in (u'~', u'null', u'Null', u'NULL', u'null # none'):
+            config = u'name: app\nversion: {0}\n'.format(value)
+            self.assertEqual(extract_version(config), u'', value)
+
+    def test_first_document_only(self):
+        config = u'---\nname: app\n---\nversion: 2.0\n'
+        self.assertEqual(extract_version(config), u'')
+
+    def test_comment_before_document_marker(self):
+        config = u'# my app\n\n---\nversion: "3.0"\nname: app\n'
+        self.assertEqual(extract_version(config), u'3.0')
+
+    def test_directive_before_document_marker(self):
+        config = u'%YAML 1.1\n---\nname: app\nversion: 3.1\n'
+        self.assertEqual(extract_version(config), u'3.1')
+
+    def test_not_a_mapping(self):
+        self.assertEqual(extract_version(u'- version\n'), u'')
+
+
+class TestConfigDigest(unittest.TestCase):
+
+    def test_ignores_formatting_and_volatile_keys(self):
+        first = u'version: 1.0\nname: app\nitems: [1, 2]\n'
+        second = u'# comment\nitems:\n- 1\n- 2\nname: app\nversion: 2.0\n'
+        self.assertTrue(configs_equal(first, second))
+        self.assertFalse(configs_equal(first, u'name: app\nitems: [2, 1]\n'))
+
+    def test_mixed_key_types(self):
+        digest = config_digest(u'1: a\nb: 2\n')
+        self.assertEqual(digest, config_digest(u'b: 2\n1: a\n'))
+
+    def test_key_types_are_distinct(self):
+        self.assertNotEqual(
+            config_digest(u'{1: x}'), config_digest(u"{'1': x}"))
+        self.assertNotEqual(
+            config_digest(u'a: {true: x}'), config_digest(u'a: {1: x}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,398 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import datetime
+import threading
+import time
+import unittest
+
+import six
+
+from replicated.core import Release, ReleasesSlice, ReplicatedVendorAPI
+from replicated.exceptions import ReplicatedError
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+CONFIG = u'''\
+---
+replicated_api_version: 2.3.5
+name: "Test"
+version: "2.0.0"
+components: []
+'''
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=1, releases=3, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def test_does_not_wait_for_a_free_connection(self):
+        # Given
+        api = ReplicatedVendorAPI('token', pool_maxsize=1)
+        self.addCleanup(api.session.close)
+        url = self.server.url + '/app/app0/releases'
+        responses = []
+
+        def get_both():
+            for _ in range(2):
+                responses.append(api.session.get(url, stream=True))
+
+        # When
+        thread = threading.Thread(target=get_both)
+        thread.daemon = True
+        thread.start()
+        thread.join(10)
+
+        # Then
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(
+            [response.status_code for response in responses], [200, 200])
+        for response in responses:
+            response.close()
+
+
+class TestAppPublish(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=5, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+        self.releases = self.server.data.apps['app0']['releases']
+
+    def test_publish_new_config(self):
+        # Given
+        channel = self.app.channels[1]
+
+        # When
+        report = self.app.publish(CONFIG, channel, archive_previous=True)
+
+        # Then
+        self.assertTrue(report.created)
+        self.assertTrue(report.archived)
+        self.assertEqual(report.previous.sequence, 4)
+        release = report.release
+        self.assertEqual(release.sequence, 6)
+        self.assertFalse(release.editable)
+        self.assertEqual(release.version, u'2.0.0')
+        self.assertEqual(
+            [ch.id for ch in release.active_channels], [channel.id])
+        self.assertEqual(channel.release_sequence, 6)
+        self.assertEqual(channel.release_label, u'2.0.0')
+        self.assertFalse(self.releases[6]['Editable'])
+        self.assertEqual(self.releases[6]['Config'], CONFIG)
+        self.assertNotIn(4, self.releases)
+
+    def test_publish_unchanged_config(self):
+        # Given
+        channel = self.app.channels[0]
+        self.app.publish(CONFIG, channel)
+        count = self.server.request_count
+
+        # When
+        report = self.app.publish(
+            CONFIG.replace(u'2.0.0', u'2.0.1'), channel.name)
+
+        # Then
+        self.assertFalse(report.created)
+        self.assertEqual(report.release.sequence, 6)
+        self.assertEqual(self.server.request_count, count + 1)
+        self.assertEqual(sorted(self.releases), [1, 2, 3, 4, 5, 6])
+
+    def test_publish_keeps_release_of_other_channel(self):
+        # Given
+        data = self.server.data.apps['app0']
+        data['channels'][1]['ReleaseSequence'] = 5
+        data['bodies'].clear()
+        app = self.api.get_app(id='app0')
+
+        # When
+        report = app.publish(CONFIG, app.channels[0], archive_previous=True)
+
+        # Then
+        self.assertTrue(report.created)
+        self.assertFalse(report.archived)
+        self.assertEqual(report.previous.sequence, 5)
+        self.assertIn(5, self.releases)
+
+    def test_publish_after_previous_release_archived(self):
+        # Given
+        data = self.server.data.apps['app0']
+        del self.releases[5]
+        data['bodies'].clear()
+
+        # When
+        report = self.app.publish(
+            CONFIG, self.app.channels[0], archive_previous=True)
+
+        # Then
+        self.assertTrue(report.created)
+        self.assertFalse(report.archived)
+        self.assertIsNone(report.previous)
+        sequence = data['channels'][0]['ReleaseSequence']
+        self.assertEqual(report.release.sequence, sequence)
+        self.assertEqual(self.releases[sequence]['Config'], CONFIG)
+
+    def test_publish_on_new_channel(self):
+        # When
+        report = self.app.publish(CONFIG, u'Beta')
+
+        # Then
+        self.assertTrue(report.created_channel)
+        self.assertTrue(report.created)
+        self.assertIsNone(report.previous)
+        self.assertEqual(report.channel.name, u'Beta')
+        self.assertEqual(report.channel.release_sequence, 6)
+
+
+class TestAppArchiveReleases(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=1, releases=50, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+        self.releases = self.server.data.apps['app0']['releases']
+
+    def patch_archive(self, archive):
+        original = Release.archive
+
+        def patched(release):
+            return archive(original, release)
+
+        Release.archive = patched
+        self.addCleanup(setattr, Release, 'archive', original)
+
+    def test_archive_range(self):
+        # When
+        results = self.app.archive_releases(
+            min_sequence=10, max_sequence=40,
+            where=lambda release: release.sequence % 2 == 0, page_size=7)
+
+        # Then
+        archived = list(range(40, 9, -2))
+        self.assertEqual(
+            [result.item.sequence for result in results], archived)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(
+            sorted(self.releases),
+            sorted(set(range(1, 51)) - set(archived)))
+
+    def test_archive_with_failures_mid_page(self):
+        # Given
+        def archive(original, release):
+            if release.sequence in (45, 38):
+                # Archived by the server, but reported as failed, as
+                # when a retry after a timeout gets a 404.
+                original(release)
+                raise ReplicatedError('Not found', 404)
+            if release.sequence in (47, 36):
+                raise ReplicatedError('Bad request', 400)
+            return original(release)
+
+        self.patch_archive(archive)
+
+        # When
+        results = self.app.archive_releases(
+            max_sequence=48, inactive=True, max_workers=2, page_size=5)
+
+        # Then
+        self.assertEqual(
+            [result.item.sequence for result in results],
+            list(range(48, 0, -1)))
+        self.assertEqual(
+            [result.item.sequence for result in results if not result.ok],
+            [47, 45, 38, 36])
+        self.assertEqual(sorted(self.releases), [36, 47, 49, 50])
+
+    def archived_before(self, created_before):
+        results = self.app.archive_releases(
+            created_before=created_before, page_size=20)
+        return [result.item.sequence for result in results]
+
+    def test_created_before(self):
+        # Given
+        for sequence in (10, 20):
+            self.releases[sequence]['CreatedAt'] = '2015-12-31T22:30:00Z'
+        self.server.data.apps['app0']['bodies'].clear()
+        if six.PY3:
+            utc_plus_two = datetime.timezone(datetime.timedelta(hours=2))
+            cutoff = datetime.datetime(
+                2016, 1, 1, 0, 45, tzinfo=utc_plus_two)
+        else:  # pragma: no cover
+            cutoff = datetime.datetime(2015, 12, 31, 22, 45)
+
+        # When/Then
+        self.assertEqual(self.archived_before('2015-12-31T22:30:00Z'), [])
+        self.assertEqual(self.archived_before(cutoff), [20, 10])
+        self.assertEqual(
+            self.archived_before(datetime.date(2016, 1, 2)),
+            list(range(50, 20, -1)) + list(range(19, 10, -1)) +
+            list(range(9, 0, -1)))
+        self.assertEqual(self.releases, {})
+
+    def test_created_before_with_offset(self):
+        with self.assertRaises(ValueError):
+            self.app.archive_releases(
+                created_before='2016-01-01T02:00:00+02:00')
+        self.assertEqual(len(self.releases), 50)
+
+
+
+class OutOfOrderSlice(ReleasesSlice):
+    """A slice whose later pages are fetched faster than earlier ones.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(OutOfOrderSlice, self).__init__(*args, **kwargs)
+        self.windows = []
+        self.completed = []
+        self._lock = threading.Lock()
+
+    def _fetch_page(self, start, count):
+        with self._lock:
+            self.windows.append((start, count))
+        page = start // self.page_size
+        time.sleep(0.005 * (self.max_workers - page % self.max_workers))
+        releases_json = super(OutOfOrderSlice, self)._fetch_page(
+            start, count)
+        with self._lock:
+            self.completed.append(start)
+        return releases_json
+
+
+class TestReleaseActiveChannels(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=5, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+
+    def make_release(self, sequence, *args, **kwargs):
+        return Release(
+            self.app, sequence, '1.0.{0}'.format(sequence), False,
+            '2016-01-01T00:00:00Z', '2016-01-01T00:00:00Z', *args, **kwargs)
+
+    def test_resolved_lazily(self):
+        # Given
+        release, = self.app.releases[0:1]
+        channel = self.app.channels[0]
+
+        # When
+        channels = release.active_channels
+
+        # Then
+        self.assertEqual([ch.id for ch in channels], [channel.id])
+        self.assertIs(channels[0], channel)
+
+    def test_given_to_the_constructor(self):
+        # Given
+        channel = self.app.channels[1]
+
+        # When
+        positional = self.make_release(4, [channel])
+        keyword = self.make_release(4, active_channels=[channel])
+
+        # Then
+        self.assertIs(positional.active_channels[0], channel)
+        self.assertIs(keyword.active_channels[0], channel)
+        self.assertEqual(self.make_release(4).active_channels, [])
+
+    def test_equality(self):
+        # Given
+        first, second = self.app.channels
+        listed, = self.app.releases[1:2]
+
+        # When/Then
+        self.assertEqual(self.make_release(4, [second]), listed)
+        self.assertNotEqual(self.make_release(4, [first]), listed)
+        self.assertNotEqual(self.make_release(4), listed)
+        listed.active_channels = [first]
+        self.assertEqual(self.make_release(4, [first]), listed)
+
+
+class TestReleasesSlice(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=1, releases=250, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+
+    def sequences(self, releases):
+        return [release.sequence for release in releases]
+
+    def test_slices(self):
+        for releases in (self.app.releases, self.app.releases.prefetch()):
+            self.assertEqual(
+                self.sequences(releases[:]), list(range(250, 0, -1)))
+            self.assertEqual(
+                self.sequences(releases[5:]), list(range(245, 0, -1)))
+            self.assertEqual(
+                self.sequences(releases[3:10]), list(range(247, 240, -1)))
+            self.assertEqual(releases[10:10], [])
+
+    def test_prefetch_slice_in_order(self):
+        # Given
+        releases = OutOfOrderSlice(
+            self.app, self.api.session, page_size=7, max_workers=4)
+
+        # When
+        result = releases[3:200]
+
+        # Then
+        self.assertEqual(self.sequences(result), list(range(247, 50, -1)))
+        self.assertEqual(
+            sorted(releases.windows),
+            [(start, 7) for start in range(3, 199, 7)] + [(199, 1)])
+        self.assertNotEqual(releases.completed, sorted(releases.completed))
+
+    def test_prefetch_iteration_in_order(self):
+        # Given
+        releases = OutOfOrderSlice(
+            self.app, self.api.session, page_size=7, max_workers=3)
+
+        # When
+        result = list(releases)
+
+        # Then
+        self.assertEqual(self.sequences(result), list(range(250, 0, -1)))
+        # 35 full pages and a last page of 5 releases, fetched three at
+        # a time.
+        self.assertEqual(
+            sorted(releases.windows),
+            [(start, 7) for start in range(0, 252, 7)])
+        self.assertNotEqual(releases.completed, sorted(releases.completed))
+
+    def test_prefetch_iteration_stops_at_short_page(self):
+        # Given
+        releases = OutOfOrderSlice(
+            self.app, self.api.session, page_size=7, max_workers=4)
+
+        # When
+        result = list(releases.iterate(start=240))
+
+        # Then
+        self.assertEqual(self.sequences(result), list(range(10, 0, -1)))
+        self.assertEqual(
+            sorted(releases.windows),
+            [(240, 7), (247, 7), (254, 7), (261, 7)])
+
+    def test_negative_indices(self):
+        for releases in (self.app.releases, self.app.releases.prefetch()):
+            with self.assertRaises(ValueError):
+                releases[-5:]
+            with self.assertRaises(ValueError):
+                releases[:-1]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import threading
+import unittest
+
+from replicated.core import Channel, LicenseIndex, ReplicatedVendorAPI
+from replicated.exceptions import ReplicatedError
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+class LicenseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=3, licenses=6)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+        self.data = self.server.data.apps['app0']
+
+    def ids(self, licenses):
+        return sorted(license.id for license in licenses)
+
+
+class TestLicenseIndex(LicenseTestCase):
+
+    def test_lookups(self):
+        # Given
+        licenses = self.app.licenses
+        channel = self.app.channels[1]
+
+        # When
+        index = LicenseIndex(licenses)
+
+        # Then
+        self.assertEqual(len(index), 6)
+        self.assertEqual(self.ids(index), self.ids(licenses))
+        self.assertIs(index.get('app0-license3'), licenses[3])
+        self.assertIsNone(index.get('unknown'))
+        self.assertEqual(
+            self.ids(index.by_assignee('customer-3')), ['app0-license3'])
+        self.assertEqual(index.by_assignee('nobody'), [])
+        self.assertEqual(
+            self.ids(index.by_channel(channel)),
+            ['app0-license1', 'app0-license3', 'app0-license5'])
+        self.assertEqual(
+            self.ids(index.by_channel(channel.id)),
+            self.ids(index.by_channel(channel)))
+        self.assertIs(index.find('customer-3', channel), licenses[3])
+        self.assertIs(index.find('customer-3', channel.id), licenses[3])
+        self.assertIsNone(index.find('customer-3', self.app.channels[0]))
+        self.assertIn(licenses[0], index)
+
+    def test_add_replaces_same_id(self):
+        # Given
+        index = LicenseIndex(self.app.licenses)
+        channel = self.app.channels[0]
+        refetched = self.app.licenses[3]
+
+        # When
+        index.add(refetched)
+
+        # Then
+        self.assertEqual(len(index), 6)
+        self.assertIs(index.get('app0-license3'), refetched)
+        self.assertEqual(index.by_assignee('customer-3'), [refetched])
+        self.assertIn(refetched, index)
+        self.assertIsNone(index.find('customer-3', channel))
+
+    def test_app_license_index(self):
+        # Given
+        count = self.server.request_count
+
+        # When
+        index = self.app.license_index
+        again = self.app.license_index
+
+        # Then
+        self.assertIs(again, index)
+        self.assertEqual(len(index), 6)
+        self.assertEqual(self.server.request_count, count + 1)
+
+    def test_rebuilt_with_licenses(self):
+        # Given
+        index = self.app.license_index
+
+        # When
+        licenses = self.app.licenses
+
+        # Then
+        self.assertIsNot(self.app.license_index, index)
+        self.assertEqual(
+            self.ids(self.app.license_index), self.ids(licenses))
+
+
+class TestCreateLicense(LicenseTestCase):
+
+    def test_create_license(self):
+        # Given
+        channel = self.app.channels[0]
+
+        # When
+        license = channel.create_license('new-customer')
+
+        # Then
+        self.assertEqual(license.assignee, 'new-customer')
+        self.assertIs(license.channel, channel)
+        self.assertIs(
+            self.app.license_index.find('new-customer', channel), license)
+        self.assertEqual(len(self.data['licenses']), 7)
+
+    def test_duplicate(self):
+        # Given
+        channel = self.app.channels[0]
+        channel.create_license('new-customer')
+        count = self.server.request_count
+
+        # When/Then
+        with self.assertRaises(ValueError):
+            channel.create_license('new-customer')
+        with self.assertRaises(ValueError):
+            channel.create_license('customer-0')
+        self.assertEqual(self.server.request_count, count)
+        self.assertEqual(len(self.data['licenses']), 7)
+
+    def test_same_assignee_on_another_channel(self):
+        # When
+        license = self.app.channels[1].create_license('customer-0')
+
+        # Then
+        self.assertEqual(
+            self.ids(self.app.license_index.by_assignee('customer-0')),
+            ['app0-license0', license.id])
+
+
+class TestCreateLicenses(LicenseTestCase):
+
+    def patch_post_license(self, post_license):
+        original = Channel._post_license
+        lock = threading.Lock()
+        calls = []
+
+        def patched(channel, assignee, update_policy=None):
+            with lock:
+                calls.append((assignee, channel.id))
+            return post_license(original, channel, assignee, update_policy)
+
+        Channel._post_license = patched
+        self.addCleanup(setattr, Channel, '_post_license', original)
+        return calls
+
+    def test_skips_existing_and_repeated(self):
+        # Given
+        first, second = self.app.channels
+        calls = self.patch_post_license(
+            lambda original, *args: original(*args))
+        assignments = [
+            ('customer-0', first), ('new-0', first), ('customer-0', second),
+            ('new-0', first), ('new-0', second), ('customer-1', second)]
+
+        # When
+        report = self.app.create_licenses(assignments, max_workers=2)
+
+        # Then
+        self.assertEqual(
+            sorted((license.assignee, license.channel.id)
+                   for license in report.created),
+            [('customer-0', second.id), ('new-0', first.id),
+             ('new-0', second.id)])
+        self.assertEqual(
+            report.skipped,
+            [('customer-0', first), ('new-0', first), ('customer-1', second)])
+        self.assertEqual(report.failed, [])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(self.data['licenses']), 9)
+        for license in report.created:
+            self.assertIs(self.app.license_index.get(license.id), license)
+
+    def test_failures_do_not_stop_the_batch(self):
+        # Given
+        channel = self.app.channels[0]
+
+        def post_license(original, channel, assignee, update_policy):
+            if assignee in ('new-1', 'new-3'):
+                raise ReplicatedError('Bad request', 400)
+            return original(channel, assignee, update_policy)
+
+        calls = self.patch_post_license(post_license)
+        assignees = ['new-{0}'.format(index) for index in range(5)]
+
+        # When
+        report = channel.create_licenses(assignees, max_workers=2)
+
+        # Then
+        self.assertEqual(
+            sorted(license.assignee for license in report.created),
+            ['new-0', 'new-2', 'new-4'])
+        self.assertEqual(
+            [(assignee, failed.id, error.status_code)
+             for assignee, failed, error in report.failed],
+            [('new-1', channel.id, 400), ('new-3', channel.id, 400)])
+        self.assertEqual(report.skipped, [])
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(len(self.data['licenses']), 9)
+        self.assertIsNone(self.app.license_index.find('new-1', channel))
+
+    def test_no_retries_by_default(self):
+        # Given
+        channel = self.app.channels[0]
+
+        def post_license(original, channel, assignee, update_policy):
+            raise ReplicatedError('Unavailable', 503)
+
+        calls = self.patch_post_license(post_license)
+
+        # When
+        report = channel.create_licenses(['new-0'])
+        retried = channel.create_licenses(['new-1'], retries=2)
+
+        # Then
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(len(retried.failed), 1)
+        self.assertEqual(
+            [assignee for assignee, _ in calls],
+            ['new-0', 'new-1', 'new-1', 'new-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+from email.utils import formatdate
+import time
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+
+from replicated.retry import (
+    RetryPolicy, TokenBucket, backoff_delay, retry_after)
+from replicated.session import VendorSession
+
+
+def make_response(status_code=200, headers=None, content=b'{}'):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = content
+    return response
+
+
+class FakeClock(object):
+    """A clock advanced by the sleep function it provides.
+
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedAdapter(BaseAdapter):
+    """A transport adapter answering requests with a fixed sequence of
+    responses or exceptions.
+
+    """
+
+    def __init__(self, outcomes):
+        super(ScriptedAdapter, self).__init__()
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        outcome.request = request
+        outcome.url = request.url
+        return outcome
+
+    def close(self):
+        pass
+
+
+class TestRetryAfter(unittest.TestCase):
+
+    def test_missing(self):
+        self.assertIsNone(retry_after(make_response(429)))
+
+    def test_seconds(self):
+        response = make_response(429, {'Retry-After': '12'})
+        self.assertEqual(retry_after(response), 12.0)
+        response = make_response(429, {'Retry-After': '-3'})
+        self.assertEqual(retry_after(response), 0.0)
+
+    def test_http_date(self):
+        value = formatdate(time.time() + 30, usegmt=True)
+        delay = retry_after(make_response(503, {'Retry-After': value}))
+        self.assertTrue(25 <= delay <= 30, delay)
+        value = formatdate(time.time() - 30, usegmt=True)
+        delay = retry_after(make_response(503, {'Retry-After': value}))
+        self.assertEqual(delay, 0.0)
+
+    def test_invalid(self):
+        response = make_response(429, {'Retry-After': 'soon'})
+        self.assertIsNone(retry_after(response))
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_backoff_delay(self):
+        for attempt, maximum in ((1, 0.5), (2, 1.0), (3, 2.0), (10, 30.0)):
+            delay = backoff_delay(attempt)
+            self.assertTrue(maximum / 2 <= delay <= maximum, delay)
+
+    def test_should_retry_responses(self):
+        policy = RetryPolicy(total=2)
+        self.assertTrue(policy.should_retry('GET', 1, make_response(503)))
+        self.assertTrue(policy.should_retry('put', 2, make_response(500)))
+        self.assertFalse(policy.should_retry('GET', 3, make_response(503)))
+        self.assertFalse(policy.should_retry('GET', 1, make_response(404)))
+        self.assertFalse(policy.should_retry('POST', 1, make_response(503)))
+        self.assertTrue(policy.should_retry('POST', 1, make_response(429)))
+
+    def test_should_retry_errors(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry(
+            'GET', 1, error=requests.ConnectionError()))
+        self.assertTrue(policy.should_retry(
+            'GET', 1, error=requests.Timeout()))
+        self.assertFalse(policy.should_retry(
+            'POST', 1, error=requests.ConnectionError()))
+        self.assertFalse(policy.should_retry('GET', 1, error=ValueError()))
+
+    def test_should_retry_long_retry_after(self):
+        policy = RetryPolicy(max_retry_after=60)
+        response = make_response(429, {'Retry-After': '3600'})
+        self.assertFalse(policy.should_retry('GET', 1, response))
+        response = make_response(429, {'Retry-After': '60'})
+        self.assertTrue(policy.should_retry('GET', 1, response))
+        policy = RetryPolicy(max_retry_after=None)
+        response = make_response(429, {'Retry-After': '3600'})
+        self.assertTrue(policy.should_retry('GET', 1, response))
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1.0, max_backoff=4.0)
+        response = make_response(429, {'Retry-After': '45'})
+        self.assertEqual(policy.delay(1, response), 45.0)
+        self.assertTrue(0.5 <= policy.delay(1, make_response(503)) <= 1.0)
+        self.assertTrue(2.0 <= policy.delay(5) <= 4.0)
+        policy = RetryPolicy(backoff=1.0, respect_retry_after=False)
+        self.assertTrue(0.5 <= policy.delay(1, response) <= 1.0)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_acquire(self):
+        # Given
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+
+        # When
+        for _ in range(4):
+            bucket.acquire()
+
+        # Then
+        self.assertEqual(clock.sleeps, [0.5, 0.5])
+        self.assertEqual(clock.now, 1.0)
+
+    def test_refill_is_bounded_by_capacity(self):
+        # Given
+        clock = FakeClock()
+        bucket = TokenBucket(1, capacity=2, clock=clock, sleep=clock.sleep)
+        clock.now += 100
+
+        # When
+        for _ in range(3):
+            bucket.acquire()
+
+        # Then
+        self.assertEqual(clock.sleeps, [1.0])
+
+    def test_pause(self):
+        # Given
+        clock = FakeClock()
+        bucket = TokenBucket(2, clock=clock, sleep=clock.sleep)
+
+        # When
+        bucket.pause(5)
+        bucket.acquire()
+
+        # Then
+        self.assertEqual(clock.sleeps, [5.0, 0.5])
+
+
+class TestVendorSessionRetries(unittest.TestCase):
+
+    url = 'http://vendor.test/vendor/v1/apps'
+
+    def make_session(self, outcomes, **kwargs):
+        session = VendorSession(**kwargs)
+        adapter = ScriptedAdapter(outcomes)
+        session.mount('http://vendor.test/', adapter)
+        self.addCleanup(session.close)
+        return session, adapter
+
+    def test_retries_transient_failures(self):
+        # Given
+        session, adapter = self.make_session(
+            [requests.ConnectionError(), make_response(503),
+             make_response(200)],
+            retry=RetryPolicy(backoff=0.001))
+
+        # When
+        response = session.get(self.url)
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(adapter.requests), 3)
+
+    def test_gives_up_after_total(self):
+        # Given
+        session, adapter = self.make_session(
+            [make_response(503), make_response(502)],
+            retry=RetryPolicy(total=1, backoff=0.001))
+
+        # When
+        response = session.get(self.url)
+
+        # Then
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_does_not_retry_post_after_server_error(self):
+        # Given
+        session, adapter = self.make_session(
+            [make_response(503)], retry=RetryPolicy(backoff=0.001))
+
+        # When
+        response = session.post(self.url)
+
+        # Then
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_rate_limited_pauses_the_bucket(self):
+        # Given
+        clock = FakeClock()
+        bucket = TokenBucket(2, clock=clock, sleep=clock.sleep)
+        paused = []
+        original_pause = bucket.pause
+
+        def pause(seconds):
+            paused.append(seconds)
+            original_pause(seconds)
+
+        bucket.pause = pause
+        session, adapter = self.make_session(
+            [make_response(429, {'Retry-After': '0'}), make_response(201)],
+            retry=RetryPolicy(), rate_limiter=bucket)
+
+        # When
+        response = session.post(self.url)
+
+        # Then
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(paused, [0.0])
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_long_retry_after_is_returned(self):
+        # Given
+        session, adapter = self.make_session(
+            [make_response(429, {'Retry-After': '3600'})],
+            retry=RetryPolicy())
+
+        # When
+        response = session.get(self.url)
+
+        # Then
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_other_errors_are_raised(self):
+        # Given
+        session, adapter = self.make_session(
+            [requests.TooManyRedirects()], retry=RetryPolicy())
+
+        # When/Then
+        with self.assertRaises(requests.TooManyRedirects):
+            session.get(self.url)
+        self.assertEqual(len(adapter.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import unittest
+
+from replicated.core import ReplicatedVendorAPI
+from replicated.snapshot import Snapshot
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=3, releases=30, licenses=6)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+        self.snapshot = Snapshot()
+        self.addCleanup(self.snapshot.close)
+
+    def sequences(self, releases):
+        return [release.sequence for release in releases]
+
+    def test_pull(self):
+        # When
+        self.snapshot.pull(self.app)
+
+        # Then
+        app = self.snapshot.app(name=self.app.name)
+        channels = app.channels
+        self.assertEqual(
+            self.sequences(self.snapshot.releases(app, limit=3)),
+            [30, 29, 28])
+        self.assertEqual(
+            self.sequences(self.snapshot.releases(app, channel=channels[1])),
+            [29])
+        self.assertEqual(len(self.snapshot.licenses(app)), 6)
+        self.assertEqual(
+            len(self.snapshot.licenses(app, channel=channels[0])), 2)
+
+    def test_refresh_adds_new_releases(self):
+        # Given
+        self.snapshot.pull(self.app)
+        self.app.create_release()
+
+        # When
+        changed = self.snapshot.refresh(self.app)
+
+        # Then
+        self.assertEqual(self.sequences(changed), [31])
+        app = self.snapshot.app(id=self.app.id)
+        self.assertEqual(
+            self.sequences(self.snapshot.releases(app, editable=True)), [31])
+
+    def test_refresh_after_promoting_an_older_release(self):
+        # Given
+        self.snapshot.pull(self.app)
+        channel = self.app.channels[1]
+        release, = self.app.releases[10:11]
+        self.assertEqual(release.sequence, 20)
+        release.promote([channel])
+
+        # When
+        changed = self.snapshot.refresh(self.app)
+
+        # Then
+        self.assertEqual(changed, [])
+        app = self.snapshot.app(id=self.app.id)
+        channel = app.channels[1]
+        releases = self.snapshot.releases(app, channel=channel)
+        self.assertEqual(self.sequences(releases), [20])
+        self.assertEqual(
+            [ch.id for ch in releases[0].active_channels], [channel.id])
+        self.assertEqual(self.snapshot.release(app, 29).active_channels, [])
+
+    def test_app_criteria(self):
+        with self.assertRaises(TypeError):
+            self.snapshot.app(id='app0', name='Benchmark App 0')
+        with self.assertRaises(ValueError):
+            self.snapshot.app(id='app0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import io
+import json
+import random
+import unittest
+
+from replicated import streaming
+from replicated.session import VendorSession, iter_json
+from replicated.streaming import _JSONArrayReader, iter_json_items
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+_STRINGS = [
+    u'', u'plain', u'quote " and backslash \\', u'tab\tnew\nline',
+    u'\xe9t\xe9', u'\u65e5\u672c\u8a9e', u'\U0001f600', u'\x00\x1f',
+    u'/slash',
+]
+
+_NUMBERS = [0, -1, 7, 1234567890123, 0.5, -2.25, 1e-07, 6.02e+23]
+
+
+def random_value(rng, depth=0):
+    choice = rng.randrange(7 if depth < 3 else 4)
+    if choice == 0:
+        return rng.choice(_NUMBERS)
+    if choice == 1:
+        return rng.choice(_STRINGS)
+    if choice == 2:
+        return rng.choice([True, False, None])
+    if choice == 3:
+        return rng.randint(-10 ** 6, 10 ** 6) * 10 ** rng.randint(0, 3)
+    if choice == 4:
+        return rng.uniform(-1e6, 1e6)
+    if choice == 5:
+        return [random_value(rng, depth + 1)
+                for _ in range(rng.randrange(4))]
+    return dict(
+        (rng.choice(_STRINGS) + str(index), random_value(rng, depth + 1))
+        for index in range(rng.randrange(4)))
+
+
+def random_document(rng):
+    items = [random_value(rng) for _ in range(rng.randrange(8))]
+    return json.dumps(
+        items, ensure_ascii=rng.choice([True, False]),
+        indent=rng.choice([None, 1]),
+        separators=rng.choice([(',', ':'), (', ', ': ')]))
+
+
+def read_items(text, key=None, chunk_size=1):
+    stream = io.BytesIO(text.encode('utf-8'))
+    return list(_JSONArrayReader(stream, chunk_size).items(key))
+
+
+class TestJSONArrayReader(unittest.TestCase):
+
+    def test_matches_json_loads(self):
+        # Given
+        rng = random.Random(0)
+
+        for _ in range(200):
+            text = random_document(rng)
+            expected = json.loads(text)
+
+            for chunk_size in range(1, 8):
+                # When
+                items = read_items(text, chunk_size=chunk_size)
+
+                # Then
+                self.assertEqual(items, expected, (text, chunk_size))
+
+    def test_numbers_across_chunks(self):
+        # Given
+        text = u'[12345678, -0.125e-3, 98765, 1E+2]'
+        expected = json.loads(text)
+
+        for chunk_size in range(1, 8):
+            # When
+            items = read_items(text, chunk_size=chunk_size)
+
+            # Then
+            self.assertEqual(items, expected, chunk_size)
+
+    def test_number_at_end_of_stream(self):
+        # A number is only complete once the next chunk is read.
+        for chunk_size in range(1, 8):
+            self.assertEqual(
+                read_items(u'[123456789]', chunk_size=chunk_size),
+                [123456789])
+
+    def test_escaped_and_multibyte_strings(self):
+        # Given
+        items = [u'\xe9\xe8', u'\u65e5\u672c', u'\U0001f600',
+                 u'a\\"b\\\\', u'\\u00e9 is literal', u'line\nbreak']
+        texts = [json.dumps(items), json.dumps(items, ensure_ascii=False)]
+
+        for text in texts:
+            for chunk_size in range(1, 8):
+                # When
+                result = read_items(text, chunk_size=chunk_size)
+
+                # Then
+                self.assertEqual(result, items, (text, chunk_size))
+
+    def test_key_skips_other_members(self):
+        # Given
+        text = json.dumps({
+            'totalCount': 3,
+            'other': {'releases': [0], 'nested': [[1, 2], {'a': u'"]'}]},
+            'releases': [{'Sequence': 3}, {'Sequence': 2}, {'Sequence': 1}],
+            'after': [4],
+        })
+
+        for chunk_size in range(1, 8):
+            # When
+            items = read_items(text, key='releases', chunk_size=chunk_size)
+
+            # Then
+            self.assertEqual(
+                [item['Sequence'] for item in items], [3, 2, 1])
+
+    def test_missing_key(self):
+        with self.assertRaises(KeyError):
+            read_items(u'{"a": [1], "b": 2}', key='releases')
+
+    def test_empty_array(self):
+        self.assertEqual(read_items(u' [ ] '), [])
+        self.assertEqual(read_items(u'{"releases": []}', 'releases'), [])
+
+    def test_invalid_documents(self):
+        for text in (u'', u'{}', u'[1 2]', u'[1,', u'[1'):
+            with self.assertRaises(ValueError):
+                read_items(text, chunk_size=3)
+
+
+class TestIterJSONItems(unittest.TestCase):
+
+    def items(self, text, key=None, use_ijson=True):
+        original = streaming.ijson
+        if not use_ijson:
+            streaming.ijson = None
+        try:
+            stream = io.BytesIO(text.encode('utf-8'))
+            return list(iter_json_items(stream, key=key, chunk_size=5))
+        finally:
+            streaming.ijson = original
+
+    def test_fallback(self):
+        # Given
+        text = json.dumps({'releases': [{'Sequence': 1}], 'totalCount': 1})
+
+        # When
+        items = self.items(text, key='releases', use_ijson=False)
+
+        # Then
+        self.assertEqual(items, [{'Sequence': 1}])
+
+    @unittest.skipIf(streaming.ijson is None, 'Requires ijson')
+    def test_ijson_and_fallback_agree(self):
+        # Given
+        rng = random.Random(1)
+
+        for _ in range(50):
+            text = random_document(rng)
+            keyed = u'{{"totalCount": 0, "releases": {0}}}'.format(text)
+
+            # When/Then
+            self.assertEqual(
+                self.items(text), self.items(text, use_ijson=False))
+            self.assertEqual(
+                self.items(keyed, 'releases'),
+                self.items(keyed, 'releases', use_ijson=False))
+
+
+class TestIterJSON(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=2, releases=3, licenses=500)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.url = self.server.url + '/app/app0/licenses'
+
+    def make_session(self, **kwargs):
+        session = VendorSession(**kwargs)
+        self.addCleanup(session.close)
+        responses = []
+        get = session.get
+
+        def recording_get(url, **kwargs):
+            response = get(url, **kwargs)
+            responses.append(response)
+            return response
+
+        session.get = recording_get
+        return session, responses
+
+    def test_streamed(self):
+        # Given
+        session, responses = self.make_session(stream_json=True)
+
+        # When
+        licenses = list(iter_json(session, self.url))
+
+        # Then
+        self.assertEqual(
+            [license['Assignee'] for license in licenses],
+            ['customer-{0}'.format(index) for index in range(500)])
+        self.assertTrue(responses[0].raw.closed)
+
+    def test_abandoned_generator_closes_response(self):
+        # Given
+        session, responses = self.make_session(stream_json=True)
+        licenses = iter_json(session, self.url)
+        next(licenses)
+        response, = responses
+        self.assertFalse(response.raw.closed)
+
+        # When
+        licenses.close()
+
+        # Then
+        self.assertTrue(response.raw.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
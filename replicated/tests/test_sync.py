@@ -0,0 +1,164 @@
+#  Copyright (c) 2016 by Enthought, Inc.
+#  All rights reserved.
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from replicated.core import ReplicatedVendorAPI
+from replicated.sync import ReleaseSync, _sync_floor
+from replicated.tests.fake_vendor_api import FakeVendorAPI
+
+
+class TestReleasesSince(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=1, releases=50, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+
+    def test_stops_at_known_release(self):
+        # Given
+        count = self.server.request_count
+
+        # When
+        releases = list(self.app.releases.since(44, page_size=3))
+
+        # Then
+        self.assertEqual(
+            [release.sequence for release in releases],
+            list(range(50, 44, -1)))
+        # Pages of 50-48, 47-45 and 44-42.
+        self.assertEqual(self.server.request_count, count + 3)
+
+    def test_nothing_new(self):
+        # Given
+        count = self.server.request_count
+
+        # When
+        releases = list(self.app.releases.since(50, page_size=3))
+
+        # Then
+        self.assertEqual(releases, [])
+        self.assertEqual(self.server.request_count, count + 1)
+
+
+class TestReleaseSync(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeVendorAPI(channels=1, releases=30, licenses=0)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api = ReplicatedVendorAPI('token')
+        self.app = self.api.get_app(id='app0')
+        self.data = self.server.data.apps['app0']
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'sync.json')
+
+    def sequences(self, releases):
+        return [release.sequence for release in releases]
+
+    def edit(self, sequence, editable=True, edited_at=None):
+        release = self.data['releases'][sequence]
+        release['Editable'] = editable
+        if edited_at is not None:
+            release['EditedAt'] = edited_at
+        self.data['bodies'].clear()
+
+    def test_sync_floor(self):
+        self.assertEqual(_sync_floor(30, []), 30)
+        self.assertEqual(_sync_floor(30, [28, 12]), 11)
+
+    def test_first_sync_lists_everything(self):
+        # Given
+        sync = ReleaseSync(self.app)
+        self.assertIsNone(sync.sequence)
+
+        # When
+        releases = sync.sync()
+
+        # Then
+        self.assertEqual(self.sequences(releases), list(range(30, 0, -1)))
+        self.assertEqual(sync.sequence, 30)
+
+    def test_new_releases(self):
+        # Given
+        sync = ReleaseSync(self.app, page_size=4)
+        sync.sync()
+        for sequence in (31, 32):
+            self.server.data.add_release(self.data, sequence)
+        count = self.server.request_count
+
+        # When
+        releases = sync.sync()
+
+        # Then
+        self.assertEqual(self.sequences(releases), [32, 31])
+        self.assertEqual(sync.sequence, 32)
+        self.assertEqual(self.server.request_count, count + 1)
+        self.assertEqual(sync.sync(), [])
+
+    def test_edited_releases(self):
+        # Given
+        self.edit(25)
+        self.edit(29)
+        sync = ReleaseSync(self.app, page_size=4)
+        sync.sync()
+
+        # When
+        self.edit(29, edited_at='2016-02-01T00:00:00Z')
+        edited = sync.sync()
+        self.edit(25, editable=False)
+        promoted = sync.sync()
+        unchanged = sync.sync()
+
+        # Then
+        self.assertEqual(self.sequences(edited), [29])
+        self.assertEqual(self.sequences(promoted), [25])
+        self.assertEqual(unchanged, [])
+
+    def test_state_file(self):
+        # Given
+        self.edit(27)
+        sync = ReleaseSync(self.app, path=self.path)
+        sync.sync()
+
+        # When
+        self.server.data.add_release(self.data, 31)
+        self.edit(27, edited_at='2016-02-01T00:00:00Z')
+        reloaded = ReleaseSync(self.app, path=self.path)
+        releases = reloaded.sync()
+
+        # Then
+        self.assertEqual(reloaded.sequence, 31)
+        self.assertEqual(self.sequences(releases), [31, 27])
+        with open(self.path) as fh:
+            state = json.load(fh)
+        self.assertEqual(state['app0'], {
+            'sequence': 31,
+            'editable': {'27': '2016-02-01T00:00:00Z'},
+        })
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_state_file_shared_by_apps(self):
+        # Given
+        with open(self.path, 'w') as fh:
+            json.dump({'other': {'sequence': 3, 'editable': {}}}, fh)
+        sync = ReleaseSync(self.app, path=self.path)
+
+        # When
+        sync.sync()
+
+        # Then
+        with open(self.path) as fh:
+            state = json.load(fh)
+        self.assertEqual(sorted(state), ['app0', 'other'])
+        self.assertEqual(state['other']['sequence'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -97,12 +97,13 @@ if not is_released:
 if __name__ == "__main__":
     install_requires = [
         'six',
-        'attrs >= 15.0.0',
+        'attrs >= 17.1.0',
         'requests >= 2.3.0',
         'ruamel.yaml == 0.12.6',
     ]
     py2_requires = install_requires + [
         'enum34 >= 1.1.0',
+        'futures >= 3.0.0',
     ]
     __version__ = write_version_py()
     if sys.version_info < (3, 0):
@@ -116,6 +117,9 @@ if __name__ == "__main__":
         author_email="info@enthought.com",
         install_requires=install_requires,
         extras_require={
+            'async:python_version>="3.6"': ['aiohttp >= 3.0.0'],
+            'analytics': ['numpy >= 1.13'],
+            'streaming': ['ijson >= 3.1'],
             ':python_version=="2.7"': py2_requires,
             ':python_version=="3.2"': install_requires,
             ':python_version=="3.3"': install_requires,